@@ -1,6 +1,13 @@
 # AFD.py
-from typing import Set, Dict, List, Optional
-from AFN import AFN, Estado, obtener_cerradura_epsilon
+import sys
+import mmap
+import struct
+from array import array
+from collections import OrderedDict
+from typing import Set, Dict, List, Optional, FrozenSet, Tuple
+from AFN import AFN, Estado, obtener_cerradura_epsilon, obtener_cerraduras, obtener_clases, \
+    compilar_afn_bits, mover_bits_clase, AFNCompacto, obtener_cerraduras_bits, mover_compacto
+from clases import ClasesEquivalencia, ConjuntoCaracteres, MapaClases, MAX_CODIGO
 
 class AFD:
     def __init__(self):
@@ -10,6 +17,9 @@ class AFD:
         self.estados_finales: Set[int] = set()
         self._contador: int = 0
         self.alfabeto: Set[str] = set()
+        # Carácter -> etiqueta de su clase en el alfabeto; None si las
+        # transiciones están etiquetadas con los caracteres mismos
+        self.clases: Optional[ClasesEquivalencia] = None
 
     def crear_estado(self, conjunto_ids: frozenset[int], es_final: bool) -> int:
         qid = self._contador
@@ -27,8 +37,14 @@ class AFD:
         self.transiciones[q_origen][simbolo] = q_destino
         self.alfabeto.add(simbolo)
 
-def cerradura_epsilon_conjunto(estados: Set[Estado]) -> Set[Estado]:
+def cerradura_epsilon_conjunto(estados: Set[Estado],
+                               cerraduras: Optional[Dict[int, FrozenSet[Estado]]] = None) -> Set[Estado]:
     res: Set[Estado] = set()
+    if cerraduras is not None:
+        for e in estados:
+            if e not in res:
+                res.update(cerraduras[e.id])
+        return res
     visitados: Set[int] = set()
     for e in estados:
         res.update(obtener_cerradura_epsilon(e, visitados))
@@ -43,9 +59,14 @@ def mover(estados: Set[Estado], simbolo: str) -> Set[Estado]:
     return alcanzados
 
 def convertir_afn_a_afd(afn: AFN) -> AFD:
+    if isinstance(afn, AFNCompacto):
+        return convertir_afn_compacto_a_afd(afn)
     afd = AFD()
+    cerraduras = obtener_cerraduras(afn)
+    clases = obtener_clases(afn)
+    afd.clases = clases
 
-    S0 = cerradura_epsilon_conjunto({afn.estado_inicial})
+    S0 = cerradura_epsilon_conjunto({afn.estado_inicial}, cerraduras)
     S0_ids = frozenset(s.id for s in S0)
     es_final_S0 = any(afn.estados[sid].es_final for sid in S0_ids)
     q0 = afd.crear_estado(S0_ids, es_final_S0)
@@ -59,8 +80,12 @@ def convertir_afn_a_afd(afn: AFN) -> AFD:
         qT = indice[T_ids]
         T_obj = {afn.estados[sid] for sid in T_ids}
 
-        for a in sorted(afn.alfabeto):
-            U = cerradura_epsilon_conjunto(mover(T_obj, a))
+        # Una transición por clase de equivalencia, no por carácter
+        for clase in range(1, clases.num_clases):
+            movidos: Set[Estado] = set()
+            for a in clases.simbolos_de_clase[clase]:
+                movidos |= mover(T_obj, a)
+            U = cerradura_epsilon_conjunto(movidos, cerraduras)
             if not U:
                 continue
             U_ids = frozenset(s.id for s in U)
@@ -71,7 +96,48 @@ def convertir_afn_a_afd(afn: AFN) -> AFD:
                 pendientes.append(U_ids)
             else:
                 qU = indice[U_ids]
-            afd.agregar_transicion(qT, a, qU)
+            afd.agregar_transicion(qT, clases.etiquetas[clase], qU)
+
+    return afd
+
+def ids_de_mascara(mascara: int) -> frozenset:
+    ids = []
+    while mascara:
+        bajo = mascara & -mascara
+        ids.append(bajo.bit_length() - 1)
+        mascara ^= bajo
+    return frozenset(ids)
+
+def convertir_afn_compacto_a_afd(afn: AFNCompacto) -> AFD:
+    """Subconjuntos sobre el CSR: cada conjunto es una máscara de estados, así
+    que la cerradura es un OR y el índice de conjuntos se indexa por enteros"""
+    afd = AFD()
+    cerraduras = obtener_cerraduras_bits(afn)
+    clases = obtener_clases(afn)
+    afd.clases = clases
+
+    simbolos_de_clase = [{afn.id_simbolo[s] for s in simbolos if s in afn.id_simbolo}
+                         for simbolos in clases.simbolos_de_clase]
+    S0 = cerraduras[afn.inicial]
+    q0 = afd.crear_estado(ids_de_mascara(S0), (S0 & afn.mascara_finales) != 0)
+    afd.estado_inicial = q0
+
+    indice: Dict[int, int] = {S0: q0}
+    pendientes: List[int] = [S0]
+
+    while pendientes:
+        T = pendientes.pop()
+        qT = indice[T]
+        for clase in range(1, clases.num_clases):
+            U = mover_compacto(afn, T, simbolos_de_clase[clase], cerraduras)
+            if not U:
+                continue
+            qU = indice.get(U)
+            if qU is None:
+                qU = afd.crear_estado(ids_de_mascara(U), (U & afn.mascara_finales) != 0)
+                indice[U] = qU
+                pendientes.append(U)
+            afd.agregar_transicion(qT, clases.etiquetas[clase], qU)
 
     return afd
 
@@ -79,8 +145,266 @@ def simular_afd(afd: AFD, cadena: str) -> bool:
     if afd.estado_inicial is None:
         return False
     q = afd.estado_inicial
+    clases = afd.clases
     for c in cadena:
+        if clases is not None:
+            c = clases.etiqueta(c)
         q = afd.transiciones.get(q, {}).get(c, None)
         if q is None:
             return False
     return q in afd.estados_finales
+
+# Tabla de transiciones compilada: cada carácter se traduce a una clase entera y
+# las transiciones quedan en un arreglo plano (estado × clase -> estado).
+# La fila 0 es el estado muerto y la clase 0 agrupa los caracteres fuera del
+# alfabeto, así que un carácter desconocido siempre cae al estado muerto.
+ESTADO_MUERTO = 0
+
+class TablaAFD:
+    def __init__(self):
+        # Se indexa con clases[c]; los caracteres se resuelven por intervalos
+        self.clases: MapaClases = MapaClases([0], [0])
+        self.num_clases: int = 1
+        self.num_estados: int = 1
+        # Las entradas guardan el desplazamiento de fila del destino (destino * num_clases)
+        self.tabla: array = array('i')
+        self.inicial: int = ESTADO_MUERTO
+        self.finales: bytearray = bytearray(1)
+        # Estado del AFD original -> fila en la tabla
+        self.estado_a_fila: Dict[int, int] = {}
+
+def compilar_afd(afd: AFD) -> TablaAFD:
+    tabla = TablaAFD()
+    if afd.estado_inicial is None:
+        tabla.tabla = array('i', [ESTADO_MUERTO])
+        return tabla
+
+    # Renumerar estados de forma densa; la fila 0 queda reservada al estado muerto
+    estados = sorted(afd.estados)
+    fila: Dict[int, int] = {q: i + 1 for i, q in enumerate(estados)}
+    n = len(estados) + 1
+
+    # Símbolos con la misma columna de destinos comparten clase
+    firmas: Dict[tuple, int] = {}
+    columna: Dict[str, int] = {}
+    for s in sorted(afd.alfabeto):
+        firma = tuple(fila.get(afd.transiciones.get(q, {}).get(s), ESTADO_MUERTO) for q in estados)
+        if firma not in firmas:
+            firmas[firma] = len(firmas) + 1
+        columna[s] = firmas[firma]
+    k = len(firmas) + 1
+
+    # Intervalos de puntos de código -> columna, fusionando los contiguos
+    clases = afd.clases if afd.clases is not None else ClasesEquivalencia(afd.alfabeto)
+    inicios: List[int] = []
+    columnas: List[int] = []
+    for inicio, clase in zip(clases.inicios, clases.clase_de_intervalo):
+        c = columna.get(clases.etiquetas[clase], 0)
+        if not columnas or columnas[-1] != c:
+            inicios.append(inicio)
+            columnas.append(c)
+    tabla.clases = MapaClases(inicios, columnas)
+
+    datos = array('i', bytes(4 * n * k))
+    for firma, c in firmas.items():
+        for i, destino in enumerate(firma):
+            datos[(i + 1) * k + c] = destino * k
+
+    finales = bytearray(n)
+    for q in afd.estados_finales:
+        if q in fila:
+            finales[fila[q]] = 1
+
+    tabla.num_clases = k
+    tabla.num_estados = n
+    tabla.tabla = datos
+    tabla.inicial = fila[afd.estado_inicial] * k
+    tabla.finales = finales
+    tabla.estado_a_fila = fila
+    return tabla
+
+def simular_tabla(tabla: TablaAFD, cadena: str) -> bool:
+    t = tabla.tabla
+    clases = tabla.clases
+    q = tabla.inicial
+    if q == ESTADO_MUERTO:
+        return False
+    for c in cadena:
+        q = t[q + clases[c]]
+        if q == ESTADO_MUERTO:
+            return False
+    return tabla.finales[q // tabla.num_clases] == 1
+
+# Formato binario de la tabla compilada (todo en little-endian):
+#   cabecera  <4sHHIIII: firma, versión, reservado, filas, clases, fila inicial, número de intervalos
+#   intervalos por cada uno <II primer punto de código, clase
+#   finales   un byte por fila, relleno hasta múltiplo de 8
+#   tabla     int32 por fila × clase con el desplazamiento de fila del destino
+FIRMA_TABLA = b'AFDT'
+VERSION_TABLA = 2
+_CABECERA = struct.Struct('<4sHHIIII')
+
+def guardar_tabla(tabla: TablaAFD, ruta: str):
+    partes = [_CABECERA.pack(FIRMA_TABLA, VERSION_TABLA, 0, tabla.num_estados, tabla.num_clases,
+                             tabla.inicial // tabla.num_clases, len(tabla.clases.inicios))]
+    for inicio, clase in zip(tabla.clases.inicios, tabla.clases.columnas):
+        partes.append(struct.pack('<II', inicio, clase))
+    partes.append(bytes(tabla.finales))
+    largo = sum(len(p) for p in partes)
+    partes.append(bytes(-largo % 8))
+
+    datos = array('i', tabla.tabla)
+    if sys.byteorder == 'big':
+        datos.byteswap()
+    partes.append(datos.tobytes())
+
+    with open(ruta, 'wb') as f:
+        for p in partes:
+            f.write(p)
+
+def guardar_afd(afd: AFD, ruta: str):
+    guardar_tabla(compilar_afd(afd), ruta)
+
+def cargar_tabla(ruta: str) -> TablaAFD:
+    # La tabla y los finales quedan como vistas sobre el archivo mapeado;
+    # sólo los intervalos de clases se materializan
+    with open(ruta, 'rb') as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    vista = memoryview(mapa)
+
+    if len(vista) < _CABECERA.size:
+        raise ValueError(f"Archivo de tabla inválido: {ruta}")
+    firma, version, _, n, k, fila_inicial, num_intervalos = _CABECERA.unpack_from(vista, 0)
+    if firma != FIRMA_TABLA:
+        raise ValueError(f"Archivo de tabla inválido: {ruta}")
+    if version != VERSION_TABLA:
+        raise ValueError(f"Versión de tabla no soportada: {version}")
+
+    tabla = TablaAFD()
+    pos = _CABECERA.size
+    inicios: List[int] = []
+    columnas: List[int] = []
+    for inicio, clase in struct.iter_unpack('<II', vista[pos:pos + 8 * num_intervalos]):
+        inicios.append(inicio)
+        columnas.append(clase)
+    pos += 8 * num_intervalos
+    if not inicios or inicios[0] != 0:
+        raise ValueError(f"Archivo de tabla inválido: {ruta}")
+    tabla.clases = MapaClases(inicios, columnas)
+
+    tabla.finales = vista[pos:pos + n]
+    pos += n
+    pos += -pos % 8
+
+    crudo = vista[pos:pos + 4 * n * k]
+    if len(crudo) != 4 * n * k:
+        raise ValueError(f"Archivo de tabla truncado: {ruta}")
+    if sys.byteorder == 'little':
+        tabla.tabla = crudo.cast('i')
+    else:
+        tabla.tabla = array('i', bytes(crudo))
+        tabla.tabla.byteswap()
+
+    tabla.num_estados = n
+    tabla.num_clases = k
+    tabla.inicial = fila_inicial * k
+    return tabla
+
+def tabla_a_afd(tabla: TablaAFD) -> AFD:
+    # Reconstruye un AFD con dicts (fila r -> estado r - 1), sin el estado muerto
+    afd = AFD()
+    k = tabla.num_clases
+    for fila in range(1, tabla.num_estados):
+        afd.crear_estado(frozenset([fila - 1]), tabla.finales[fila] == 1)
+    if tabla.inicial != ESTADO_MUERTO:
+        afd.estado_inicial = tabla.inicial // k - 1
+
+    # Cada columna se etiqueta con la clase formada por sus intervalos
+    inicios = tabla.clases.inicios
+    rangos: Dict[int, List[Tuple[int, int]]] = {}
+    for i, clase in enumerate(tabla.clases.columnas):
+        if clase != 0:
+            fin = inicios[i + 1] - 1 if i + 1 < len(inicios) else MAX_CODIGO
+            rangos.setdefault(clase, []).append((inicios[i], fin))
+    etiquetas = {clase: ConjuntoCaracteres(r).etiqueta() for clase, r in rangos.items()}
+
+    for clase, simbolo in etiquetas.items():
+        for fila in range(1, tabla.num_estados):
+            destino = tabla.tabla[fila * k + clase]
+            if destino != ESTADO_MUERTO:
+                afd.agregar_transicion(fila - 1, simbolo, destino // k - 1)
+    afd.alfabeto = set(etiquetas.values())
+    afd.clases = ClasesEquivalencia(afd.alfabeto)
+    return afd
+
+# AFD perezoso: los subconjuntos del AFN (máscaras de bits) se crean sólo
+# cuando la entrada llega a ellos y se guardan en una caché acotada.
+POLITICAS_CACHE = ('lru', 'vaciar')
+
+class AFDPerezoso:
+    def __init__(self, afn: AFN, max_estados: int = 1024, politica: str = 'lru',
+                 no_anclado: bool = False):
+        if politica not in POLITICAS_CACHE:
+            raise ValueError(f"Política de caché desconocida: {politica!r}")
+        if max_estados < 1:
+            raise ValueError("La caché debe admitir al menos un estado.")
+        self.bits = compilar_afn_bits(afn)
+        self.max_estados = max_estados
+        self.politica = politica
+        # Sin anclar equivale a un prefijo implícito .*: el estado inicial se
+        # vuelve a activar después de cada símbolo
+        self.no_anclado = no_anclado
+        # Estado (máscara) -> transiciones ya calculadas desde él, por clase
+        self.cache: "OrderedDict[int, Dict[int, int]]" = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.vaciados = 0
+
+    def obtener_fila(self, estado: int) -> Dict[int, int]:
+        fila = self.cache.get(estado)
+        if fila is not None:
+            if self.politica == 'lru':
+                self.cache.move_to_end(estado)
+            return fila
+        if len(self.cache) >= self.max_estados:
+            if self.politica == 'lru':
+                self.cache.popitem(last=False)
+                self.desalojos += 1
+            else:
+                self.cache.clear()
+                self.vaciados += 1
+        fila = {}
+        self.cache[estado] = fila
+        return fila
+
+    def transicion(self, estado: int, simbolo: str) -> int:
+        clase = self.bits.clases.clase(simbolo)
+        fila = self.obtener_fila(estado)
+        destino = fila.get(clase)
+        if destino is None:
+            self.fallos += 1
+            destino = mover_bits_clase(self.bits, estado, clase)
+            if self.no_anclado:
+                destino |= self.bits.inicial
+            fila[clase] = destino
+        else:
+            self.aciertos += 1
+        return destino
+
+    def estadisticas(self) -> Dict[str, int]:
+        return {
+            'estados_en_cache': len(self.cache),
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'desalojos': self.desalojos,
+            'vaciados': self.vaciados,
+        }
+
+def simular_afd_perezoso(perezoso: AFDPerezoso, cadena: str) -> bool:
+    q = perezoso.bits.inicial
+    for c in cadena:
+        if not q:
+            return False
+        q = perezoso.transicion(q, c)
+    return (q & perezoso.bits.finales) != 0
@@ -1,8 +1,15 @@
 # AFN.py
-from typing import Set, Dict, List, Optional
+from array import array
+from collections.abc import Mapping
+from typing import Set, Dict, List, Optional, FrozenSet, Tuple
 from ShuntingYard import infix_to_postfix, expand_operators
+from simplificacion import simplificar_postfix
+from clases import ClasesEquivalencia
+from perfil import contar
 
 class Estado:
+    __slots__ = ('id', 'transiciones', 'es_final')
+
     def __init__(self, id_estado: int):
         self.id = id_estado
         self.transiciones: Dict[str, List["Estado"]] = {}
@@ -20,6 +27,10 @@ class AFN:
         self.estados_finales: Set[int] = set()
         self.contador_estados = 0
         self.alfabeto: Set[str] = set()
+        # Índice de cerraduras ε por id de estado; se construye al primer uso
+        self.cerraduras: Optional[Dict[int, FrozenSet[Estado]]] = None
+        # Clases de equivalencia del alfabeto; también se construyen al primer uso
+        self.clases: Optional[ClasesEquivalencia] = None
 
     def crear_estado(self) -> Estado:
         estado = Estado(self.contador_estados)
@@ -38,46 +49,56 @@ class AFN:
         if simbolo != '@': 
             self.alfabeto.add(simbolo)
 
-def construir_afn_simbolo(simbolo: str) -> AFN:
-    afn = AFN()
+# Construcción de Thompson sobre un único AFN que hace de arena de estados.
+# Cada operador trabaja con fragmentos (inicio, fin) y sólo agrega los estados
+# y transiciones ε que lo enlazan, sin copiar los operandos.
+Fragmento = Tuple[Estado, Estado]
+
+def fragmento_simbolo(afn: AFN, simbolo: str) -> Fragmento:
     q0 = afn.crear_estado()
     qf = afn.crear_estado()
-    afn.establecer_inicial(q0)
-    afn.establecer_final(qf)
     q0.agregar_transicion(simbolo, qf)
     afn.agregar_simbolo_alfabeto(simbolo)
-    return afn
+    return q0, qf
 
-def construir_afn_concatenacion(afn1: AFN, afn2: AFN) -> AFN:
-    afn = AFN()
-    map1: Dict[int, Estado] = {}
-    for e_id, _ in afn1.estados.items():
-        map1[e_id] = afn.crear_estado()
-    map2: Dict[int, Estado] = {}
-    for e_id, _ in afn2.estados.items():
-        map2[e_id] = afn.crear_estado()
-
-    for e_id, e in afn1.estados.items():
-        for s, ds in e.transiciones.items():
-            for d in ds:
-                map1[e_id].agregar_transicion(s, map1[d.id])
-                afn.agregar_simbolo_alfabeto(s)
-    for e_id, e in afn2.estados.items():
-        for s, ds in e.transiciones.items():
-            for d in ds:
-                map2[e_id].agregar_transicion(s, map2[d.id])
-                afn.agregar_simbolo_alfabeto(s)
+def fragmento_concatenacion(afn: AFN, f1: Fragmento, f2: Fragmento) -> Fragmento:
+    f1[1].agregar_transicion('@', f2[0])
+    return f1[0], f2[1]
 
-    afn.establecer_inicial(map1[afn1.estado_inicial.id])
+def fragmento_union(afn: AFN, f1: Fragmento, f2: Fragmento) -> Fragmento:
+    ni = afn.crear_estado()
+    nf = afn.crear_estado()
+    ni.agregar_transicion('@', f1[0])
+    ni.agregar_transicion('@', f2[0])
+    f1[1].agregar_transicion('@', nf)
+    f2[1].agregar_transicion('@', nf)
+    return ni, nf
 
-    for f_id in afn1.estados_finales:
-        map1[f_id].agregar_transicion('@', map2[afn2.estado_inicial.id])
+def fragmento_kleene(afn: AFN, f: Fragmento) -> Fragmento:
+    ni = afn.crear_estado()
+    nf = afn.crear_estado()
+    ni.agregar_transicion('@', f[0])
+    ni.agregar_transicion('@', nf)
+    f[1].agregar_transicion('@', nf)
+    f[1].agregar_transicion('@', f[0])
+    return ni, nf
 
-    for f_id in afn2.estados_finales:
-        afn.establecer_final(map2[f_id])
+def fragmento_positivo(afn: AFN, f: Fragmento) -> Fragmento:
+    # Igual que la cerradura de Kleene pero sin el atajo ε hacia el final
+    ni = afn.crear_estado()
+    nf = afn.crear_estado()
+    ni.agregar_transicion('@', f[0])
+    f[1].agregar_transicion('@', nf)
+    f[1].agregar_transicion('@', f[0])
+    return ni, nf
 
-    afn.alfabeto = afn1.alfabeto.union(afn2.alfabeto)
-    return afn
+def fragmento_opcional(afn: AFN, f: Fragmento) -> Fragmento:
+    ni = afn.crear_estado()
+    nf = afn.crear_estado()
+    ni.agregar_transicion('@', f[0])
+    ni.agregar_transicion('@', nf)
+    f[1].agregar_transicion('@', nf)
+    return ni, nf
 
 def obtener_cerradura_epsilon(estado: Estado, visitados: Optional[Set[int]] = None) -> Set[Estado]:
     if visitados is None:
@@ -86,25 +107,72 @@ def obtener_cerradura_epsilon(estado: Estado, visitados: Optional[Set[int]] = No
         return set()
     visitados.add(estado.id)
     cerr = {estado}
-    if '@' in estado.transiciones:
-        for d in estado.transiciones['@']:
-            cerr.update(obtener_cerradura_epsilon(d, visitados))
+    pila = [estado]
+    while pila:
+        e = pila.pop()
+        for d in e.transiciones.get('@', ()):
+            if d.id not in visitados:
+                visitados.add(d.id)
+                cerr.add(d)
+                pila.append(d)
     return cerr
 
-def construir_afn_desde_expresion(expresion: str) -> AFN:
+def construir_indice_cerraduras(afn: AFN) -> Dict[int, FrozenSet[Estado]]:
+    indice: Dict[int, FrozenSet[Estado]] = {}
+    for e in afn.estados.values():
+        cerr = {e}
+        pila = [e]
+        while pila:
+            x = pila.pop()
+            for d in x.transiciones.get('@', ()):
+                if d in cerr:
+                    continue
+                # Si la cerradura del destino ya existe se reutiliza completa
+                previa = indice.get(d.id)
+                if previa is not None:
+                    cerr.update(previa)
+                else:
+                    cerr.add(d)
+                    pila.append(d)
+        indice[e.id] = frozenset(cerr)
+    contar('cerraduras', len(indice))
+    return indice
+
+def obtener_cerraduras(afn: AFN) -> Dict[int, FrozenSet[Estado]]:
+    if afn.cerraduras is None:
+        afn.cerraduras = construir_indice_cerraduras(afn)
+    return afn.cerraduras
+
+def obtener_clases(afn: AFN) -> ClasesEquivalencia:
+    if afn.clases is None:
+        afn.clases = ClasesEquivalencia(afn.alfabeto)
+    return afn.clases
+
+def construir_afn_desde_expresion(expresion: str, simplificar: bool = True) -> AFN:
     expandida = expand_operators(expresion)
 
     postfijo_tokens = infix_to_postfix(expandida)
+    if simplificar:
+        postfijo_tokens = simplificar_postfix(postfijo_tokens)
+
+    return construir_afn_desde_postfix(postfijo_tokens)
 
+def construir_afn_desde_postfix(postfijo_tokens: List[str]) -> AFN:
+    afn = AFN()
+    inicio, fin = construir_fragmento(afn, postfijo_tokens)
+    afn.establecer_inicial(inicio)
+    afn.establecer_final(fin)
+    return afn
 
+def construir_fragmento(afn: AFN, postfijo_tokens: List[str]) -> Fragmento:
     OPERADORES = {'·', '|', '*', '+', '?'}
 
-    pila: List[AFN] = []
+    pila: List[Fragmento] = []
 
     for tok in postfijo_tokens:
 
         if len(tok) == 2 and tok[0] == '\\':
-            pila.append(construir_afn_simbolo(tok[1]))
+            pila.append(fragmento_simbolo(afn, tok[1]))
             continue
 
         # Operadores
@@ -114,26 +182,31 @@ def construir_afn_desde_expresion(expresion: str) -> AFN:
                     raise ValueError(f"Postfix inválido: faltan operandos para '{tok}'.")
                 b = pila.pop()
                 a = pila.pop()
-                pila.append(construir_afn_concatenacion(a, b) if tok == '·' else construir_afn_union(a, b))
+                pila.append(fragmento_concatenacion(afn, a, b) if tok == '·' else fragmento_union(afn, a, b))
             elif tok == '*':
                 if len(pila) < 1:
                     raise ValueError("Postfix inválido: falta operando para '*'.")
                 a = pila.pop()
-                pila.append(construir_afn_kleene(a))
+                pila.append(fragmento_kleene(afn, a))
             elif tok == '+':
                 if len(pila) < 1:
                     raise ValueError("Postfix inválido: falta operando para '+'.")
                 a = pila.pop()
-                pila.append(construir_afn_positivo(a))
+                pila.append(fragmento_positivo(afn, a))
             elif tok == '?':
                 if len(pila) < 1:
                     raise ValueError("Postfix inválido: falta operando para '?'.")
                 a = pila.pop()
-                pila.append(construir_afn_opcional(a))
+                pila.append(fragmento_opcional(afn, a))
             continue
 
         if len(tok) == 1:
-            pila.append(construir_afn_simbolo(tok))
+            pila.append(fragmento_simbolo(afn, tok))
+            continue
+
+        # Clase de caracteres: una sola transición etiquetada con la clase
+        if len(tok) > 2 and tok[0] == '[':
+            pila.append(fragmento_simbolo(afn, tok))
             continue
 
         raise ValueError(f"Token inesperado en postfix: {tok!r}")
@@ -144,80 +217,317 @@ def construir_afn_desde_expresion(expresion: str) -> AFN:
 
 
 def simular_afn(afn: AFN, cadena: str) -> bool:
+    if isinstance(afn, AFNCompacto):
+        return simular_afn_compacto(afn, cadena)
     if afn.estado_inicial is None:
         return False
-    actuales = obtener_cerradura_epsilon(afn.estado_inicial)
-    for s in cadena:
+    cerraduras = obtener_cerraduras(afn)
+    clases = obtener_clases(afn)
+    actuales: Set[Estado] = set(cerraduras[afn.estado_inicial.id])
+    for c in cadena:
         nuevos: Set[Estado] = set()
-        for e in actuales:
-            if s in e.transiciones:
-                for d in e.transiciones[s]:
-                    nuevos.update(obtener_cerradura_epsilon(d))
+        for s in clases.simbolos(c):
+            for e in actuales:
+                if s in e.transiciones:
+                    for d in e.transiciones[s]:
+                        nuevos.update(cerraduras[d.id])
         actuales = nuevos
         if not actuales:
             return False
-    return any(afn.estados[e.id].es_final for e in actuales)
-
-def construir_afn_union(afn1: AFN, afn2: AFN) -> AFN:
-    afn = AFN()
-    ni = afn.crear_estado()
-    nf = afn.crear_estado()
-    afn.establecer_inicial(ni)
-    afn.establecer_final(nf)
-
-    map1: Dict[int, Estado] = {e_id: afn.crear_estado() for e_id in afn1.estados}
-    for e_id, e in afn1.estados.items():
+    return any(e.es_final for e in actuales)
+
+def invertir_afn(afn: AFN) -> AFN:
+    # Autómata del lenguaje inverso: mismas transiciones en sentido contrario,
+    # con un inicio nuevo que lleva por ε a los antiguos finales
+    inverso = AFN()
+    for e_id in sorted(afn.estados):
+        inverso.estados[e_id] = Estado(e_id)
+    inverso.contador_estados = afn.contador_estados
+    for e_id, e in afn.estados.items():
         for s, ds in e.transiciones.items():
             for d in ds:
-                map1[e_id].agregar_transicion(s, map1[d.id])
-                afn.agregar_simbolo_alfabeto(s)
-
-    map2: Dict[int, Estado] = {e_id: afn.crear_estado() for e_id in afn2.estados}
-    for e_id, e in afn2.estados.items():
+                inverso.estados[d.id].agregar_transicion(s, inverso.estados[e_id])
+    inicio = inverso.crear_estado()
+    for f_id in afn.estados_finales:
+        inicio.agregar_transicion('@', inverso.estados[f_id])
+    inverso.establecer_inicial(inicio)
+    if afn.estado_inicial is not None:
+        inverso.establecer_final(inverso.estados[afn.estado_inicial.id])
+    inverso.alfabeto = set(afn.alfabeto)
+    return inverso
+
+# Simulación bit-paralela: los estados se numeran de forma densa y el conjunto
+# activo es un único entero donde el bit i representa al estado i-ésimo.
+class AFNBits:
+    def __init__(self):
+        self.bit_de_estado: Dict[int, int] = {}
+        self.inicial: int = 0
+        self.finales: int = 0
+        # Por clase de equivalencia: máscara de estados con transición y, por
+        # bit de origen, la máscara de destinos con la cerradura ε ya aplicada
+        self.clases: Optional[ClasesEquivalencia] = None
+        self.fuentes: Dict[int, int] = {}
+        self.sucesores: Dict[int, Dict[int, int]] = {}
+
+def compilar_afn_bits(afn: AFN) -> AFNBits:
+    if isinstance(afn, AFNCompacto):
+        return compilar_afn_compacto_bits(afn)
+    bits = AFNBits()
+    bits.clases = obtener_clases(afn)
+    if afn.estado_inicial is None:
+        return bits
+    cerraduras = obtener_cerraduras(afn)
+    for i, e_id in enumerate(sorted(afn.estados)):
+        bits.bit_de_estado[e_id] = i
+
+    def mascara(estados) -> int:
+        m = 0
+        for e in estados:
+            m |= 1 << bits.bit_de_estado[e.id]
+        return m
+
+    cerr_mask = {e_id: mascara(c) for e_id, c in cerraduras.items()}
+    bits.inicial = cerr_mask[afn.estado_inicial.id]
+    for f_id in afn.estados_finales:
+        bits.finales |= 1 << bits.bit_de_estado[f_id]
+
+    for e_id, e in afn.estados.items():
+        i = bits.bit_de_estado[e_id]
         for s, ds in e.transiciones.items():
+            if s == '@':
+                continue
+            destino = 0
             for d in ds:
-                map2[e_id].agregar_transicion(s, map2[d.id])
-                afn.agregar_simbolo_alfabeto(s)
-
-
-    ni.agregar_transicion('@', map1[afn1.estado_inicial.id])
-    ni.agregar_transicion('@', map2[afn2.estado_inicial.id])
-    for f_id in afn1.estados_finales:
-        map1[f_id].agregar_transicion('@', nf)
-    for f_id in afn2.estados_finales:
-        map2[f_id].agregar_transicion('@', nf)
-
-    afn.alfabeto = afn1.alfabeto.union(afn2.alfabeto)
-    return afn
-
-def construir_afn_kleene(afn0: AFN) -> AFN:
-    afn = AFN()
-    ni = afn.crear_estado()
-    nf = afn.crear_estado()
-    afn.establecer_inicial(ni)
-    afn.establecer_final(nf)
-    mapa: Dict[int, Estado] = {e_id: afn.crear_estado() for e_id in afn0.estados}
+                destino |= cerr_mask[d.id]
+            for clase in bits.clases.clases_de_simbolo[s]:
+                sucesores = bits.sucesores.setdefault(clase, {})
+                sucesores[i] = sucesores.get(i, 0) | destino
+                bits.fuentes[clase] = bits.fuentes.get(clase, 0) | (1 << i)
+    return bits
+
+def compilar_afn_compacto_bits(afn: "AFNCompacto") -> AFNBits:
+    # Los estados del CSR ya son densos: el bit i es el estado i y las
+    # cerraduras ya están como máscaras
+    bits = AFNBits()
+    bits.clases = obtener_clases(afn)
+    if afn.inicial < 0:
+        return bits
+    cerraduras = obtener_cerraduras_bits(afn)
+    bits.bit_de_estado = {i: i for i in range(afn.num_estados)}
+    bits.inicial = cerraduras[afn.inicial]
+    bits.finales = afn.mascara_finales
+
+    clases_de_id = [()] + [bits.clases.clases_de_simbolo[s] for s in afn.simbolos[1:]]
+    desp, destinos, etiquetas = afn.desplazamientos, afn.destinos, afn.etiquetas
+    for i in range(afn.num_estados):
+        for k in range(desp[i], desp[i + 1]):
+            sid = etiquetas[k]
+            if not sid:
+                continue
+            destino = cerraduras[destinos[k]]
+            for clase in clases_de_id[sid]:
+                sucesores = bits.sucesores.setdefault(clase, {})
+                sucesores[i] = sucesores.get(i, 0) | destino
+                bits.fuentes[clase] = bits.fuentes.get(clase, 0) | (1 << i)
+    return bits
+
+def mover_bits(bits: AFNBits, activos: int, simbolo: str) -> int:
+    return mover_bits_clase(bits, activos, bits.clases.clase(simbolo))
+
+def mover_bits_clase(bits: AFNBits, activos: int, clase: int) -> int:
+    m = activos & bits.fuentes.get(clase, 0)
+    if not m:
+        return 0
+    tabla = bits.sucesores[clase]
+    nuevos = 0
+    # Sólo se recorren los estados activos que tienen transición con el símbolo
+    while m:
+        bajo = m & -m
+        nuevos |= tabla[bajo.bit_length() - 1]
+        m ^= bajo
+    return nuevos
+
+def simular_afn_bits(bits: AFNBits, cadena: str) -> bool:
+    activos = bits.inicial
+    clase = bits.clases.clase
+    for c in cadena:
+        activos = mover_bits_clase(bits, activos, clase(c))
+        if not activos:
+            return False
+    return (activos & bits.finales) != 0
+
+# Representación compacta: estados numerados de 0 a n-1, símbolos internados
+# como enteros (0 es ε) y adyacencia en formato CSR. Las transiciones del estado
+# i ocupan destinos[desplazamientos[i]:desplazamientos[i + 1]] y sus símbolos
+# están en la misma posición de etiquetas. simular_afn y convertir_afn_a_afd la
+# recorren directamente con cerraduras ε como máscaras de bits; la vista de
+# estados sólo existe para el código que espera objetos Estado (estadísticas,
+# dibujos, máscaras de bits) y no guarda lo que decodifica.
+class AFNCompacto:
+    def __init__(self):
+        self.num_estados = 0
+        self.inicial: int = -1
+        self.finales = bytearray()
+        self.mascara_finales = 0
+        self.simbolos: List[str] = ['@']
+        self.id_simbolo: Dict[str, int] = {'@': 0}
+        self.desplazamientos = array('I', [0])
+        self.destinos = array('I')
+        self.etiquetas = array('I')
+        self.estados = VistaEstados(self)
+        self.estados_finales: Set[int] = set()
+        self.alfabeto: Set[str] = set()
+        # Índices derivados; se construyen al primer uso y no se guardan en disco
+        self.cerraduras_bits: Optional[List[int]] = None
+        self.cerraduras: Optional[Dict[int, FrozenSet["EstadoCompacto"]]] = None
+        self.clases: Optional[ClasesEquivalencia] = None
+
+    def __getstate__(self):
+        estado = dict(self.__dict__)
+        for derivado in ('estados', 'cerraduras_bits', 'cerraduras', 'clases'):
+            del estado[derivado]
+        return estado
 
-    for e_id, e in afn0.estados.items():
-        for s, ds in e.transiciones.items():
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self.estados = VistaEstados(self)
+        self.cerraduras_bits = None
+        self.cerraduras = None
+        self.clases = None
+
+    @property
+    def estado_inicial(self) -> Optional["EstadoCompacto"]:
+        return self.estados[self.inicial] if self.inicial >= 0 else None
+
+    @property
+    def contador_estados(self) -> int:
+        return self.num_estados
+
+    def internar_simbolo(self, simbolo: str) -> int:
+        sid = self.id_simbolo.get(simbolo)
+        if sid is None:
+            sid = len(self.simbolos)
+            self.simbolos.append(simbolo)
+            self.id_simbolo[simbolo] = sid
+        return sid
+
+class EstadoCompacto:
+    # Se crea uno nuevo en cada consulta; la igualdad es por id de estado
+    __slots__ = ('id', 'es_final', '_afn')
+
+    def __init__(self, afn: AFNCompacto, id_estado: int):
+        self.id = id_estado
+        self.es_final = afn.finales[id_estado] == 1
+        self._afn = afn
+
+    def __eq__(self, otro) -> bool:
+        return isinstance(otro, EstadoCompacto) and otro.id == self.id and otro._afn is self._afn
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    @property
+    def transiciones(self) -> Dict[str, List["EstadoCompacto"]]:
+        afn = self._afn
+        trans: Dict[str, List[EstadoCompacto]] = {}
+        for k in range(afn.desplazamientos[self.id], afn.desplazamientos[self.id + 1]):
+            simbolo = afn.simbolos[afn.etiquetas[k]]
+            trans.setdefault(simbolo, []).append(EstadoCompacto(afn, afn.destinos[k]))
+        return trans
+
+class VistaEstados(Mapping):
+    def __init__(self, afn: AFNCompacto):
+        self._afn = afn
+
+    def __getitem__(self, id_estado: int) -> EstadoCompacto:
+        if not 0 <= id_estado < self._afn.num_estados:
+            raise KeyError(id_estado)
+        return EstadoCompacto(self._afn, id_estado)
+
+    def __iter__(self):
+        return iter(range(self._afn.num_estados))
+
+    def __len__(self) -> int:
+        return self._afn.num_estados
+
+def compactar_afn(afn: AFN) -> AFNCompacto:
+    compacto = AFNCompacto()
+    ids = sorted(afn.estados)
+    indice = {e_id: i for i, e_id in enumerate(ids)}
+    compacto.num_estados = len(ids)
+    compacto.finales = bytearray(len(ids))
+    for f_id in afn.estados_finales:
+        compacto.finales[indice[f_id]] = 1
+        compacto.estados_finales.add(indice[f_id])
+        compacto.mascara_finales |= 1 << indice[f_id]
+    if afn.estado_inicial is not None:
+        compacto.inicial = indice[afn.estado_inicial.id]
+    for e_id in ids:
+        for s, ds in afn.estados[e_id].transiciones.items():
+            sid = compacto.internar_simbolo(s)
             for d in ds:
-                mapa[e_id].agregar_transicion(s, mapa[d.id])
-                afn.agregar_simbolo_alfabeto(s)
-
-    ni.agregar_transicion('@', mapa[afn0.estado_inicial.id])
-    ni.agregar_transicion('@', nf)
-    for f_id in afn0.estados_finales:
-        mapa[f_id].agregar_transicion('@', nf)
-        mapa[f_id].agregar_transicion('@', mapa[afn0.estado_inicial.id])
-
-    afn.alfabeto = afn0.alfabeto.copy()
-    return afn
-
-
-def construir_afn_positivo(afn0: AFN) -> AFN:
-    return construir_afn_concatenacion(afn0, construir_afn_kleene(afn0))
-
-
-def construir_afn_opcional(afn0: AFN) -> AFN:
-    afn_eps = construir_afn_simbolo('@')
-    return construir_afn_union(afn0, afn_eps)
+                compacto.destinos.append(indice[d.id])
+                compacto.etiquetas.append(sid)
+        compacto.desplazamientos.append(len(compacto.destinos))
+    compacto.alfabeto = set(afn.alfabeto)
+    return compacto
+
+def obtener_cerraduras_bits(afn: AFNCompacto) -> List[int]:
+    """Cerradura ε de cada estado como máscara (bit i = estado i)"""
+    if afn.cerraduras_bits is None:
+        desp, destinos, etiquetas = afn.desplazamientos, afn.destinos, afn.etiquetas
+        cerraduras: List[int] = [0] * afn.num_estados
+        for i in range(afn.num_estados):
+            cerr = 1 << i
+            pila = [i]
+            while pila:
+                x = pila.pop()
+                for k in range(desp[x], desp[x + 1]):
+                    if etiquetas[k]:
+                        continue
+                    d = destinos[k]
+                    if cerr >> d & 1:
+                        continue
+                    # Si la cerradura del destino ya existe se reutiliza completa
+                    if cerraduras[d]:
+                        cerr |= cerraduras[d]
+                    else:
+                        cerr |= 1 << d
+                        pila.append(d)
+            cerraduras[i] = cerr
+        contar('cerraduras', afn.num_estados)
+        afn.cerraduras_bits = cerraduras
+    return afn.cerraduras_bits
+
+def mover_compacto(afn: AFNCompacto, activos: int, simbolos: Set[int], cerraduras: List[int]) -> int:
+    """Estados alcanzados desde activos por alguna etiqueta de simbolos, con su cerradura ε"""
+    desp, destinos, etiquetas = afn.desplazamientos, afn.destinos, afn.etiquetas
+    nuevos = 0
+    while activos:
+        bajo = activos & -activos
+        i = bajo.bit_length() - 1
+        activos ^= bajo
+        for k in range(desp[i], desp[i + 1]):
+            if etiquetas[k] in simbolos:
+                nuevos |= cerraduras[destinos[k]]
+    return nuevos
+
+def simular_afn_compacto(afn: AFNCompacto, cadena: str) -> bool:
+    if afn.inicial < 0:
+        return False
+    cerraduras = obtener_cerraduras_bits(afn)
+    clases = obtener_clases(afn)
+    id_simbolo = afn.id_simbolo
+    # Etiquetas internadas por clase, calculadas una vez por clase vista
+    por_clase: Dict[int, Set[int]] = {}
+    activos = cerraduras[afn.inicial]
+    for c in cadena:
+        clase = clases.clase(c)
+        simbolos = por_clase.get(clase)
+        if simbolos is None:
+            simbolos = por_clase[clase] = {id_simbolo[s] for s in clases.simbolos_de_clase[clase]
+                                                if s in id_simbolo}
+        activos = mover_compacto(afn, activos, simbolos, cerraduras)
+        if not activos:
+            return False
+    return (activos & afn.mascara_finales) != 0
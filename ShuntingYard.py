@@ -1,3 +1,5 @@
+from clases import CUALQUIERA, leer_clase, token_de_conjunto
+
 OPERADORES = {
     '|', 
     '·', 
@@ -39,7 +41,8 @@ def _is_op(t: str) -> bool:
     return t in OPERADORES
 
 def _is_literal(t: str) -> bool:
-    return (len(t) == 2 and t[0] == '\\') or (len(t) == 1 and t not in OPERADORES and t not in {'(', ')'})
+    return (len(t) == 2 and t[0] == '\\') or (len(t) == 1 and t not in OPERADORES and t not in {'(', ')'}) \
+        or (len(t) > 2 and t[0] == '[')
 
 
 
@@ -61,6 +64,16 @@ def _tokenize(expr: str):
             i += 2
             continue
 
+        # Clases de caracteres: un único token con la etiqueta canónica
+        if ch == '[':
+            conjunto, i = leer_clase(expr, i)
+            tokens.append(token_de_conjunto(conjunto))
+            continue
+        if ch == '.':
+            tokens.append(token_de_conjunto(CUALQUIERA))
+            i += 1
+            continue
+
         if ch in OPERADORES or ch in {'(', ')'}:
             tokens.append(ch)
             i += 1
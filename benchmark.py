@@ -0,0 +1,300 @@
+# Suite de rendimiento reproducible: cargas generadas con semilla fija, tiempo
+# y memoria pico por etapa del pipeline y resultados en JSON para comparar
+# corridas. También compara las dos construcciones de AFD.
+import sys
+import json
+import time
+import random
+import platform
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+from ShuntingYard import infix_to_postfix, expand_operators
+from AFN import construir_afn_desde_expresion, simular_afn
+from AFD import convertir_afn_a_afd, simular_afd
+from construccion_directa import construir_afd_directo_desde_expresion
+from minimizacion import minimizar_afd, minimizar_afd_hopcroft
+from clases import conjunto_de_simbolo
+
+# Cambiar al modificar la estructura del JSON de resultados
+VERSION_RESULTADOS = 1
+ETAPAS = ('infix_to_postfix', 'construir_afn', 'convertir_afn_a_afd', 'minimizar_afd',
+          'minimizar_afd_hopcroft', 'simular_afn', 'simular_afd')
+
+def familia_explosiva(n: int) -> str:
+    """(a|b)*a(a|b)...(a|b): el AFD mínimo tiene 2^(n+1) estados"""
+    return '(a|b)*a' + '(a|b)' * n
+
+def concatenacion_larga(n: int) -> str:
+    return ''.join('abc'[i % 3] for i in range(n))
+
+def estrellas_anidadas(n: int) -> str:
+    """((((a)*b)*a)*b)*...: n cerraduras anidadas que la simplificación no elimina"""
+    expresion = 'a'
+    for i in range(n):
+        expresion = f"({expresion})*{'ba'[i % 2]}"
+    return f"({expresion})*"
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+def comparar_construcciones(expresion: str) -> Dict:
+    """Construye el AFD por Thompson + subconjuntos y por siguientepos"""
+    afn, t_afn = medir(construir_afn_desde_expresion, expresion)
+    afd_sub, t_sub = medir(convertir_afn_a_afd, afn)
+    afd_dir, t_dir = medir(construir_afd_directo_desde_expresion, expresion)
+    return {
+        'expresion': expresion,
+        'estados_afn': len(afn.estados),
+        'estados_subconjuntos': len(afd_sub.estados),
+        'estados_directo': len(afd_dir.estados),
+        'estados_minimo': len(minimizar_afd_hopcroft(afd_dir).estados),
+        'tiempo_subconjuntos': t_afn + t_sub,
+        'tiempo_directo': t_dir,
+    }
+
+def expresiones_de_archivo(nombre_archivo: str) -> List[str]:
+    from main import parse_linea
+    expresiones = []
+    with open(nombre_archivo, 'r', encoding='utf-8') as f:
+        for linea in f:
+            expr, _ = parse_linea(linea)
+            if expr is not None and expr not in expresiones:
+                expresiones.append(expr)
+    return expresiones
+
+def mostrar_comparacion(filas: List[Dict]):
+    print(f"{'expresión':<34} {'AFN':>6} {'subconj.':>9} {'directo':>8} {'mínimo':>7} {'t subconj.':>11} {'t directo':>10}")
+    for f in filas:
+        print(f"{f['expresion'][:34]:<34} {f['estados_afn']:>6} {f['estados_subconjuntos']:>9} "
+              f"{f['estados_directo']:>8} {f['estados_minimo']:>7} "
+              f"{f['tiempo_subconjuntos']*1000:>9.2f}ms {f['tiempo_directo']*1000:>8.2f}ms")
+
+def caracter_de(etiqueta: str) -> str:
+    """Un carácter concreto de la etiqueta (símbolo o clase), imprimible si se puede"""
+    rangos = conjunto_de_simbolo(etiqueta).rangos
+    for lo, hi in rangos:
+        if lo <= 126 and hi >= 33:
+            return chr(max(lo, 33))
+    return chr(rangos[0][0])
+
+def cadena_viva(expresion: str, largo: int, generador: random.Random) -> str:
+    """Camino al azar por el AFD mínimo que nunca cae al estado muerto y termina
+    en un estado final: una cadena del lenguaje de a lo sumo `largo` caracteres
+    (se corta antes si el camino llega a un final sin salidas vivas). Con cadenas
+    uniformes al azar la mayoría de las familias muere en 1-2 caracteres y la
+    simulación no mide nada."""
+    afd = minimizar_afd_hopcroft(convertir_afn_a_afd(construir_afn_desde_expresion(expresion)))
+    if afd.estado_inicial is None:
+        return ''
+    # Distancia de cada estado a un final, hacia atrás desde los finales;
+    # los estados sin distancia son muertos
+    previos: Dict[int, List[int]] = {}
+    for q, trans in afd.transiciones.items():
+        for d in trans.values():
+            previos.setdefault(d, []).append(q)
+    distancia = {q: 0 for q in afd.estados_finales}
+    frontera = list(afd.estados_finales)
+    while frontera:
+        siguiente = []
+        for d in frontera:
+            for q in previos.get(d, ()):
+                if q not in distancia:
+                    distancia[q] = distancia[d] + 1
+                    siguiente.append(q)
+        frontera = siguiente
+
+    q = afd.estado_inicial
+    if q not in distancia:
+        return ''
+    caracteres = {s: caracter_de(s) for s in afd.alfabeto}
+    cadena = []
+    for restantes in range(largo, 0, -1):
+        # Sólo transiciones desde las que aún se llega a un final en lo que queda
+        opciones = [(s, d) for s, d in sorted(afd.transiciones.get(q, {}).items())
+                    if distancia.get(d, largo) < restantes]
+        if not opciones:
+            break
+        simbolo, q = generador.choice(opciones)
+        cadena.append(caracteres[simbolo])
+    return ''.join(cadena)
+
+def cargas_de_trabajo(archivo: Optional[str], semilla: int, largo_cadena: int) -> List[Tuple[str, str, str]]:
+    """(familia, expresión, cadena de entrada); la misma semilla da las mismas cargas.
+    Las cadenas pertenecen al lenguaje, así que cada carácter pasa por el autómata"""
+    casos: List[Tuple[str, str]] = []
+    casos += [('explosiva', familia_explosiva(n)) for n in (2, 4, 6, 8, 10)]
+    casos += [('concatenacion', concatenacion_larga(n)) for n in (50, 200, 500)]
+    casos += [('estrellas', estrellas_anidadas(n)) for n in (4, 8, 16)]
+    if archivo is not None:
+        casos += [('archivo', e) for e in expresiones_de_archivo(archivo)]
+
+    generador = random.Random(semilla)
+    cargas = []
+    for familia, expresion in casos:
+        cadena = cadena_viva(expresion, largo_cadena, generador)
+        cargas.append((familia, expresion, cadena))
+    return cargas
+
+def medir_etapa(funcion: Callable, preparar: Callable[[], tuple], repeticiones: int) -> Tuple[object, float, int]:
+    """Mejor tiempo de varias repeticiones y memoria pico de una corrida aparte.
+    preparar() crea argumentos nuevos en cada repetición para que las cachés
+    internas (cerraduras, clases) no se arrastren de una corrida a otra"""
+    mejor = float('inf')
+    resultado = None
+    for _ in range(repeticiones):
+        args = preparar()
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        mejor = min(mejor, time.perf_counter() - inicio)
+
+    # tracemalloc frena la ejecución, así que la memoria se mide fuera del cronómetro
+    args = preparar()
+    tracemalloc.start()
+    try:
+        funcion(*args)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, mejor, pico
+
+def contar_transiciones_afn(afn) -> int:
+    return sum(len(ds) for e in afn.estados.values() for ds in e.transiciones.values())
+
+def contar_transiciones_afd(afd) -> int:
+    return sum(len(t) for t in afd.transiciones.values())
+
+def ejecutar_caso(familia: str, expresion: str, cadena: str, repeticiones: int) -> Dict:
+    nuevo_afn = lambda: (construir_afn_desde_expresion(expresion),)
+    afd_fijo = convertir_afn_a_afd(construir_afn_desde_expresion(expresion))
+
+    etapas: Dict[str, Dict] = {}
+
+    def registrar(nombre: str, funcion: Callable, preparar: Callable[[], tuple], tamano=None):
+        resultado, tiempo, pico = medir_etapa(funcion, preparar, repeticiones)
+        etapas[nombre] = {'tiempo': tiempo, 'memoria_pico': pico}
+        if tamano is not None:
+            etapas[nombre].update(tamano(resultado))
+        return resultado
+
+    registrar('infix_to_postfix', infix_to_postfix, lambda: (expand_operators(expresion),),
+              lambda r: {'tokens': len(r)})
+    registrar('construir_afn', construir_afn_desde_expresion, lambda: (expresion,),
+              lambda r: {'estados': len(r.estados), 'transiciones': contar_transiciones_afn(r)})
+    registrar('convertir_afn_a_afd', convertir_afn_a_afd, nuevo_afn,
+              lambda r: {'estados': len(r.estados), 'transiciones': contar_transiciones_afd(r)})
+    registrar('minimizar_afd', minimizar_afd, lambda: (afd_fijo,),
+              lambda r: {'estados': len(r.estados), 'transiciones': contar_transiciones_afd(r)})
+    registrar('minimizar_afd_hopcroft', minimizar_afd_hopcroft, lambda: (afd_fijo,),
+              lambda r: {'estados': len(r.estados), 'transiciones': contar_transiciones_afd(r)})
+    registrar('simular_afn', simular_afn, lambda: nuevo_afn() + (cadena,),
+              lambda r: {'acepta': r, 'largo_cadena': len(cadena)})
+    registrar('simular_afd', simular_afd, lambda: (afd_fijo, cadena),
+              lambda r: {'acepta': r, 'largo_cadena': len(cadena)})
+
+    return {'familia': familia, 'expresion': expresion, 'etapas': etapas}
+
+def ejecutar_suite(archivo: Optional[str] = "expresiones.txt", semilla: int = 0,
+                   repeticiones: int = 3, largo_cadena: int = 10000) -> Dict:
+    cargas = cargas_de_trabajo(archivo, semilla, largo_cadena)
+    return {
+        'version': VERSION_RESULTADOS,
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'parametros': {'archivo': archivo, 'semilla': semilla, 'repeticiones': repeticiones,
+                       'largo_cadena': largo_cadena, 'entradas': 'vivas'},
+        'casos': [ejecutar_caso(f, e, c, repeticiones) for f, e, c in cargas],
+    }
+
+def guardar_resultados(resultados: Dict, ruta: str):
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+def cargar_resultados(ruta: str) -> Dict:
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def comparar_resultados(base: Dict, actual: Dict, tolerancia: float = 0.25,
+                        margen_tiempo: float = 0.001) -> List[str]:
+    """Etapas cuyo tiempo o memoria empeoró más que la tolerancia relativa, o
+    cuyos tamaños de autómata cambiaron. Las diferencias de tiempo menores que
+    margen_tiempo (segundos) se consideran ruido"""
+    anteriores = {(c['familia'], c['expresion']): c['etapas'] for c in base['casos']}
+    regresiones = []
+    for caso in actual['casos']:
+        clave = (caso['familia'], caso['expresion'])
+        if clave not in anteriores:
+            continue
+        for etapa, datos in caso['etapas'].items():
+            previo = anteriores[clave].get(etapa)
+            if previo is None:
+                continue
+            for medida in ('tiempo', 'memoria_pico'):
+                if medida == 'tiempo' and datos[medida] - previo[medida] < margen_tiempo:
+                    continue
+                if previo[medida] > 0 and datos[medida] > previo[medida] * (1 + tolerancia):
+                    regresiones.append(f"{clave[1][:40]} / {etapa}: {medida} "
+                                       f"{previo[medida]:.6g} -> {datos[medida]:.6g}")
+            for medida in ('estados', 'transiciones'):
+                if medida in previo and previo[medida] != datos.get(medida):
+                    regresiones.append(f"{clave[1][:40]} / {etapa}: {medida} "
+                                       f"{previo[medida]} -> {datos.get(medida)}")
+    return regresiones
+
+def mostrar_suite(resultados: Dict):
+    print(f"{'familia':<13} {'expresión':<30} " + ' '.join(f"{e[:12]:>12}" for e in ETAPAS))
+    for caso in resultados['casos']:
+        tiempos = ' '.join(f"{caso['etapas'][e]['tiempo']*1000:>10.3f}ms" for e in ETAPAS)
+        print(f"{caso['familia']:<13} {caso['expresion'][:30]:<30} {tiempos}")
+
+def leer_opcion(nombre: str, argumentos: List[str]) -> Optional[str]:
+    """Lee una opción '--nombre valor' o '--nombre=valor'; devuelve None si no está"""
+    for i, arg in enumerate(argumentos):
+        if arg == nombre and i + 1 < len(argumentos):
+            return argumentos[i + 1]
+        if arg.startswith(nombre + "="):
+            return arg.split("=", 1)[1]
+    return None
+
+if __name__ == "__main__":
+    # Uso: python benchmark.py [expresiones.txt] [--json salida.json] [--repeticiones N]
+    #                          [--semilla N] [--largo N]
+    #      python benchmark.py --comparar base.json actual.json
+    #      python benchmark.py [expresiones.txt] --construcciones
+    argumentos = sys.argv[1:]
+    if "--comparar" in argumentos:
+        i = argumentos.index("--comparar")
+        if len(argumentos) < i + 3:
+            print("Uso: python benchmark.py --comparar <base.json> <actual.json>")
+            sys.exit(1)
+        base, actual = cargar_resultados(argumentos[i + 1]), cargar_resultados(argumentos[i + 2])
+        if base['parametros'] != actual['parametros']:
+            print("Advertencia: las corridas usan parámetros distintos")
+        regresiones = comparar_resultados(base, actual)
+        for r in regresiones:
+            print(f"REGRESIÓN: {r}")
+        print(f"{len(regresiones)} regresiones encontradas")
+        sys.exit(1 if regresiones else 0)
+
+    archivo = next((a for a in argumentos if not a.startswith("--") and a.endswith(".txt")), "expresiones.txt")
+    if "--construcciones" in argumentos:
+        expresiones = expresiones_de_archivo(archivo)
+        expresiones += [familia_explosiva(n) for n in (2, 4, 6, 8, 10)]
+        mostrar_comparacion([comparar_construcciones(e) for e in expresiones])
+        sys.exit(0)
+
+    try:
+        repeticiones = int(leer_opcion("--repeticiones", argumentos) or 3)
+        semilla = int(leer_opcion("--semilla", argumentos) or 0)
+        largo = int(leer_opcion("--largo", argumentos) or 10000)
+    except ValueError:
+        print("Error: --repeticiones, --semilla y --largo requieren números enteros")
+        sys.exit(1)
+
+    resultados = ejecutar_suite(archivo, semilla, repeticiones, largo)
+    mostrar_suite(resultados)
+    salida = leer_opcion("--json", argumentos)
+    if salida is not None:
+        guardar_resultados(resultados, salida)
+        print(f"Resultados guardados en {salida}")
@@ -0,0 +1,93 @@
+# Búsqueda sin anclar: encuentra las coincidencias más a la izquierda y más
+# largas dentro de un texto sin probar la expresión desde cada posición.
+# Una pasada de derecha a izquierda con el autómata inverso sin anclar da, en
+# cada posición, los estados del AFN desde los que todavía se puede aceptar
+# con lo que resta del texto; de ahí salen los inicios de coincidencia. Desde
+# cada inicio elegido el AFD anclado avanza sólo mientras su estado toque esos
+# estados vivos, así que se detiene justo después del fin más largo y nunca
+# recorre texto que le toca a la coincidencia siguiente: en total, cada
+# carácter se visita una vez hacia atrás y a lo sumo dos hacia adelante.
+# Si la expresión tiene un literal obligatorio, str.find descarta el texto
+# que no lo contiene antes de recorrer ningún autómata.
+from typing import Iterator, List, Optional, Tuple
+from AFN import construir_afn_desde_expresion, invertir_afn
+from AFD import AFDPerezoso
+from literales import literales_de_expresion
+
+class Buscador:
+    def __init__(self, expresion: str, max_estados: int = 1024):
+        afn = construir_afn_desde_expresion(expresion)
+        self.expresion = expresion
+        self.adelante = AFDPerezoso(afn, max_estados)
+        self.reverso = AFDPerezoso(invertir_afn(afn), max_estados, no_anclado=True)
+        self.requerido = literales_de_expresion(expresion).requerido
+
+def estados_vivos(buscador: Buscador, texto: str, desde: int = 0) -> List[int]:
+    """vivos[i] = máscara de los estados del AFN desde los que algún texto[i:j]
+    lleva a un final. El AFN inverso conserva la numeración de bits del original
+    (sólo agrega un inicio con el bit más alto), así que las máscaras se cruzan
+    directamente con las del AFD hacia adelante."""
+    reverso = buscador.reverso
+    vivos = [0] * (len(texto) + 1)
+    q = reverso.bits.inicial
+    vivos[len(texto)] = q
+    for i in range(len(texto) - 1, desde - 1, -1):
+        q = reverso.transicion(q, texto[i])
+        vivos[i] = q
+    return vivos
+
+def marcar_inicios(buscador: Buscador, texto: str, desde: int = 0) -> bytearray:
+    """inicios[i] = 1 si alguna subcadena texto[i:j] pertenece al lenguaje"""
+    return _inicios_de(buscador, estados_vivos(buscador, texto, desde))
+
+def _inicios_de(buscador: Buscador, vivos: List[int]) -> bytearray:
+    # En el inverso, el inicial del original es el único final
+    final = buscador.reverso.bits.finales
+    return bytearray(1 if q & final else 0 for q in vivos)
+
+def fin_mas_largo(buscador: Buscador, texto: str, inicio: int, vivos: Optional[List[int]] = None) -> int:
+    """Fin de la coincidencia más larga que empieza en inicio, o -1"""
+    if vivos is None:
+        vivos = estados_vivos(buscador, texto, inicio)
+    adelante = buscador.adelante
+    finales = adelante.bits.finales
+    q = adelante.bits.inicial
+    fin = inicio if q & finales else -1
+    for j in range(inicio, len(texto)):
+        q = adelante.transicion(q, texto[j])
+        # Sin estados vivos ya no hay un fin más adelante (incluye q == 0)
+        if not q & vivos[j + 1]:
+            break
+        if q & finales:
+            fin = j + 1
+    return fin
+
+def buscar(buscador: Buscador, texto: str, desde: int = 0) -> Optional[Tuple[int, int]]:
+    """Primera coincidencia (más a la izquierda y más larga) desde la posición dada"""
+    if buscador.requerido and texto.find(buscador.requerido, desde) < 0:
+        return None
+    vivos = estados_vivos(buscador, texto, desde)
+    inicio = _inicios_de(buscador, vivos).find(1, desde)
+    if inicio < 0:
+        return None
+    return inicio, fin_mas_largo(buscador, texto, inicio, vivos)
+
+def buscar_todas(buscador: Buscador, texto: str) -> Iterator[Tuple[int, int]]:
+    """Todas las coincidencias sin solapamiento, de izquierda a derecha"""
+    requerido = buscador.requerido
+    if requerido and texto.find(requerido) < 0:
+        return
+    vivos = estados_vivos(buscador, texto)
+    inicios = _inicios_de(buscador, vivos)
+    desde = 0
+    while desde <= len(texto):
+        # Toda coincidencia posterior contiene el literal a partir de desde
+        if requerido and texto.find(requerido, desde) < 0:
+            return
+        inicio = inicios.find(1, desde)
+        if inicio < 0:
+            return
+        fin = fin_mas_largo(buscador, texto, inicio, vivos)
+        yield inicio, fin
+        # Tras una coincidencia vacía se avanza un carácter para no repetirla
+        desde = fin if fin > inicio else fin + 1
@@ -0,0 +1,218 @@
+# Clases de caracteres ([a-z0-9], [^abc] y .) como conjuntos de rangos de
+# puntos de código. Un autómata etiqueta sus transiciones con caracteres
+# sueltos o con la etiqueta canónica de una clase; el alfabeto se parte en
+# clases de equivalencia disjuntas (caracteres que ninguna transición
+# distingue) y la construcción de subconjuntos, la minimización y la tabla
+# trabajan por clase en lugar de por carácter.
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+MAX_CODIGO = 0x10FFFF
+# Caracteres que se escapan dentro de la etiqueta de una clase
+_ESPECIALES_CLASE = {']', '\\', '^', '-'}
+
+class ConjuntoCaracteres:
+    __slots__ = ('rangos',)
+
+    def __init__(self, rangos: Iterable[Tuple[int, int]]):
+        # Rangos inclusivos, ordenados y fusionados
+        fusionados: List[Tuple[int, int]] = []
+        for lo, hi in sorted(rangos):
+            if fusionados and lo <= fusionados[-1][1] + 1:
+                if hi > fusionados[-1][1]:
+                    fusionados[-1] = (fusionados[-1][0], hi)
+            else:
+                fusionados.append((lo, hi))
+        self.rangos: Tuple[Tuple[int, int], ...] = tuple(fusionados)
+
+    def __eq__(self, otro) -> bool:
+        return isinstance(otro, ConjuntoCaracteres) and self.rangos == otro.rangos
+
+    def __hash__(self) -> int:
+        return hash(self.rangos)
+
+    def contiene_codigo(self, codigo: int) -> bool:
+        i = bisect_right(self.rangos, (codigo, MAX_CODIGO)) - 1
+        return i >= 0 and self.rangos[i][0] <= codigo <= self.rangos[i][1]
+
+    def complemento(self) -> "ConjuntoCaracteres":
+        rangos = []
+        siguiente = 0
+        for lo, hi in self.rangos:
+            if lo > siguiente:
+                rangos.append((siguiente, lo - 1))
+            siguiente = hi + 1
+        if siguiente <= MAX_CODIGO:
+            rangos.append((siguiente, MAX_CODIGO))
+        return ConjuntoCaracteres(rangos)
+
+    def unico(self) -> str:
+        """El carácter si el conjunto tiene exactamente uno, si no ''"""
+        if len(self.rangos) == 1 and self.rangos[0][0] == self.rangos[0][1]:
+            return chr(self.rangos[0][0])
+        return ''
+
+    def etiqueta(self) -> str:
+        # Forma canónica: dos conjuntos iguales siempre dan la misma etiqueta.
+        # Un carácter suelto se etiqueta con él mismo (salvo '@', que es ε)
+        c = self.unico()
+        if c and c != '@':
+            return c
+        if self.rangos and self.rangos[-1][1] == MAX_CODIGO:
+            return '[^' + _formatear_rangos(self.complemento().rangos) + ']'
+        return '[' + _formatear_rangos(self.rangos) + ']'
+
+def _formatear_caracter(codigo: int) -> str:
+    c = chr(codigo)
+    return '\\' + c if c in _ESPECIALES_CLASE else c
+
+def _formatear_rangos(rangos: Tuple[Tuple[int, int], ...]) -> str:
+    partes = []
+    for lo, hi in rangos:
+        if lo == hi:
+            partes.append(_formatear_caracter(lo))
+        elif hi == lo + 1:
+            partes.append(_formatear_caracter(lo) + _formatear_caracter(hi))
+        else:
+            partes.append(_formatear_caracter(lo) + '-' + _formatear_caracter(hi))
+    return ''.join(partes)
+
+CUALQUIERA = ConjuntoCaracteres([(0, MAX_CODIGO)])
+
+def leer_clase(texto: str, i: int) -> Tuple[ConjuntoCaracteres, int]:
+    """Lee la clase que empieza en texto[i] == '['; devuelve el conjunto y la
+    posición siguiente al ']' de cierre"""
+    n = len(texto)
+    i += 1
+    negada = i < n and texto[i] == '^'
+    if negada:
+        i += 1
+
+    def leer_caracter(j: int) -> Tuple[str, int]:
+        if texto[j] == '\\':
+            if j + 1 >= n:
+                raise ValueError("Escape incompleto dentro de una clase de caracteres.")
+            return texto[j + 1], j + 2
+        return texto[j], j + 1
+
+    # Un ']' literal se escribe '\]'; '[^]' es la clase de todos los caracteres
+    rangos: List[Tuple[int, int]] = []
+    while True:
+        if i >= n:
+            raise ValueError("Clase de caracteres sin cerrar: falta ']'.")
+        if texto[i] == ']':
+            i += 1
+            break
+        c, i = leer_caracter(i)
+        if i + 1 < n and texto[i] == '-' and texto[i + 1] != ']':
+            d, i = leer_caracter(i + 1)
+            if ord(d) < ord(c):
+                raise ValueError(f"Rango inválido en clase de caracteres: {c}-{d}")
+            rangos.append((ord(c), ord(d)))
+        else:
+            rangos.append((ord(c), ord(c)))
+
+    conjunto = ConjuntoCaracteres(rangos)
+    if negada:
+        conjunto = conjunto.complemento()
+    if not conjunto.rangos:
+        raise ValueError("Clase de caracteres vacía.")
+    return conjunto, i
+
+def es_clase(simbolo: str) -> bool:
+    # Los caracteres sueltos tienen longitud 1; las etiquetas de clase empiezan con '['
+    return len(simbolo) > 1
+
+def token_de_conjunto(conjunto: ConjuntoCaracteres) -> str:
+    """Token de postfix para la clase; un carácter suelto queda como literal escapado,
+    salvo '@' (ε), que conserva su etiqueta de clase"""
+    c = conjunto.unico()
+    if c and c != '@':
+        return '\\' + c
+    return conjunto.etiqueta()
+
+@lru_cache(maxsize=None)
+def conjunto_de_simbolo(simbolo: str) -> ConjuntoCaracteres:
+    if not es_clase(simbolo):
+        return ConjuntoCaracteres([(ord(simbolo), ord(simbolo))])
+    conjunto, fin = leer_clase(simbolo, 0)
+    if fin != len(simbolo):
+        raise ValueError(f"Etiqueta de clase inválida: {simbolo!r}")
+    return conjunto
+
+class ClasesEquivalencia:
+    """Partición de los puntos de código en clases que ningún símbolo del
+    alfabeto distingue. La clase 0 agrupa los caracteres que no pertenecen a
+    ningún símbolo y tiene etiqueta vacía; las demás se numeran según el orden
+    de sus etiquetas"""
+
+    def __init__(self, alfabeto: Iterable[str]):
+        simbolos = sorted(alfabeto)
+        conjuntos = [conjunto_de_simbolo(s) for s in simbolos]
+
+        cortes = {0}
+        for conjunto in conjuntos:
+            for lo, hi in conjunto.rangos:
+                cortes.add(lo)
+                if hi < MAX_CODIGO:
+                    cortes.add(hi + 1)
+        self.inicios: List[int] = sorted(cortes)
+
+        # Firma de cada intervalo: índices de los símbolos que lo contienen
+        firmas = [tuple(k for k, conjunto in enumerate(conjuntos) if conjunto.contiene_codigo(lo))
+                  for lo in self.inicios]
+        rangos_de_firma: Dict[tuple, List[Tuple[int, int]]] = {}
+        for i, firma in enumerate(firmas):
+            if firma:
+                hi = self.inicios[i + 1] - 1 if i + 1 < len(self.inicios) else MAX_CODIGO
+                rangos_de_firma.setdefault(firma, []).append((self.inicios[i], hi))
+
+        por_etiqueta = sorted((ConjuntoCaracteres(r).etiqueta(), f) for f, r in rangos_de_firma.items())
+        clase_de_firma = {f: k + 1 for k, (_, f) in enumerate(por_etiqueta)}
+        self.etiquetas: List[str] = [''] + [e for e, _ in por_etiqueta]
+        # Símbolos del alfabeto que aceptan cada clase
+        self.simbolos_de_clase: List[Tuple[str, ...]] = [()] + \
+            [tuple(simbolos[k] for k in f) for _, f in por_etiqueta]
+        self.clase_de_intervalo: List[int] = [clase_de_firma.get(f, 0) for f in firmas]
+
+        self.clases_de_simbolo: Dict[str, Tuple[int, ...]] = {s: () for s in simbolos}
+        for clase in range(1, len(self.etiquetas)):
+            for s in self.simbolos_de_clase[clase]:
+                self.clases_de_simbolo[s] += (clase,)
+        self._memo: Dict[str, int] = {}
+
+    @property
+    def num_clases(self) -> int:
+        return len(self.etiquetas)
+
+    def clase(self, c: str) -> int:
+        k = self._memo.get(c)
+        if k is None:
+            k = self.clase_de_intervalo[bisect_right(self.inicios, ord(c)) - 1]
+            self._memo[c] = k
+        return k
+
+    def etiqueta(self, c: str) -> str:
+        return self.etiquetas[self.clase(c)]
+
+    def simbolos(self, c: str) -> Tuple[str, ...]:
+        """Símbolos del alfabeto cuya transición acepta el carácter c"""
+        return self.simbolos_de_clase[self.clase(c)]
+
+class MapaClases(dict):
+    """Carácter -> columna de la tabla. Se indexa con mapa[c]: los caracteres
+    nuevos se buscan en los intervalos y quedan memorizados"""
+
+    def __init__(self, inicios: List[int], columnas: List[int]):
+        super().__init__()
+        self.inicios = inicios
+        self.columnas = columnas
+
+    def __missing__(self, c: str) -> int:
+        columna = self.columnas[bisect_right(self.inicios, ord(c)) - 1]
+        self[c] = columna
+        return columna
+
+    def __reduce__(self):
+        return MapaClases, (self.inicios, self.columnas)
@@ -0,0 +1,230 @@
+# Caché de patrones compilados. Se comparten por postfix simplificado sólo los
+# autómatas y los literales; el texto y el postfix de cada expresión viajan
+# aparte, así dos escrituras equivalentes muestran cada una lo suyo.
+import os
+import pickle
+import hashlib
+import tempfile
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from ShuntingYard import infix_to_postfix
+from AFN import AFNBits, AFNCompacto, compilar_afn_bits, construir_afn_desde_postfix, compactar_afn
+from AFD import AFD, AFDPerezoso, TablaAFD, compilar_afd, convertir_afn_a_afd
+from minimizacion import minimizar_afd_hopcroft
+from simplificacion import simplificar_postfix
+from literales import Literales, extraer_literales
+from perfil import etapa, contar
+
+# Cambiar al modificar el formato guardado en disco
+VERSION_CACHE = 5
+DIRECTORIO_CACHE = '.cache_automatas'
+
+class AutomatasCompilados:
+    """Lo que comparten todas las expresiones con el mismo postfix simplificado.
+    El AFD y el AFD mínimo se construyen al primer acceso, así un patrón que sólo
+    se simula con el AFD perezoso nunca paga la construcción de subconjuntos"""
+    def __init__(self, postfix_simplificado: List[str], afn: AFNCompacto,
+                 afd: Optional[AFD] = None, afd_min: Optional[AFD] = None):
+        self.postfix_simplificado = postfix_simplificado
+        self.afn = afn
+        self._afd = afd
+        self._afd_min = afd_min
+        self._perezoso: Optional[AFDPerezoso] = None
+        self._tabla: Optional[TablaAFD] = None
+        self._bits: Optional[AFNBits] = None
+        # Se recalculan al cargar desde disco; el análisis es lineal en el árbol
+        self.literales: Literales = extraer_literales(postfix_simplificado)
+
+    @property
+    def afd(self) -> AFD:
+        if self._afd is None:
+            with etapa('subconjuntos'):
+                self._afd = convertir_afn_a_afd(self.afn)
+        return self._afd
+
+    @property
+    def afd_min(self) -> AFD:
+        if self._afd_min is None:
+            afd = self.afd
+            with etapa('minimizacion'):
+                self._afd_min = minimizar_afd_hopcroft(afd)
+        return self._afd_min
+
+    @property
+    def afd_construido(self) -> bool:
+        return self._afd is not None
+
+    @property
+    def tabla(self) -> TablaAFD:
+        # Tabla del AFD mínimo, compilada una vez por patrón
+        if self._tabla is None:
+            self._tabla = compilar_afd(self.afd_min)
+        return self._tabla
+
+    @property
+    def bits(self) -> AFNBits:
+        # Máscaras de bits del AFN, también una vez por patrón
+        if self._bits is None:
+            self._bits = compilar_afn_bits(self.afn)
+        return self._bits
+
+    @property
+    def perezoso(self) -> AFDPerezoso:
+        # Uno por patrón: su caché de estados se reutiliza en todas las líneas
+        if self._perezoso is None:
+            self._perezoso = AFDPerezoso(self.afn)
+        return self._perezoso
+
+class PatronCompilado:
+    """Una expresión concreta: su texto y su postfix, con los autómatas compartidos"""
+    def __init__(self, expresion: str, postfix: List[str], automatas: AutomatasCompilados):
+        self.expresion = expresion
+        self.postfix = postfix
+        self.automatas = automatas
+
+    @property
+    def postfix_simplificado(self) -> List[str]:
+        return self.automatas.postfix_simplificado
+
+    @property
+    def afn(self) -> AFNCompacto:
+        return self.automatas.afn
+
+    @property
+    def afd(self) -> AFD:
+        return self.automatas.afd
+
+    @property
+    def afd_min(self) -> AFD:
+        return self.automatas.afd_min
+
+    @property
+    def tabla(self) -> TablaAFD:
+        return self.automatas.tabla
+
+    @property
+    def bits(self) -> AFNBits:
+        return self.automatas.bits
+
+    @property
+    def perezoso(self) -> AFDPerezoso:
+        return self.automatas.perezoso
+
+    @property
+    def literales(self) -> Literales:
+        return self.automatas.literales
+
+def normalizar_expresion(expresion: str) -> str:
+    """Clave canónica: el postfix simplificado de la expresión, así espacios,
+    ε/@, paréntesis redundantes o alternativas repetidas no generan entradas distintas"""
+    return '\x1f'.join(simplificar_postfix(infix_to_postfix(expresion)))
+
+def _postfix_de(expresion: str) -> Tuple[List[str], List[str]]:
+    with etapa('postfix'):
+        postfix = infix_to_postfix(expresion)
+    with etapa('simplificacion'):
+        simplificado = simplificar_postfix(postfix)
+    return postfix, simplificado
+
+def compilar_automatas(simplificado: List[str], perezoso: bool = False) -> AutomatasCompilados:
+    """Con perezoso=True sólo se construye el AFN; el AFD queda para el primer acceso"""
+    # El grafo de objetos de Thompson sólo vive hasta compactarlo; la caché
+    # conserva el AFN en arreglos planos
+    with etapa('thompson'):
+        afn = compactar_afn(construir_afn_desde_postfix(simplificado))
+    automatas = AutomatasCompilados(simplificado, afn)
+    if not perezoso:
+        automatas.afd_min
+    return automatas
+
+def compilar_patron(expresion: str) -> PatronCompilado:
+    """Ejecuta el pipeline completo sin caché"""
+    postfix, simplificado = _postfix_de(expresion)
+    return PatronCompilado(expresion, postfix, compilar_automatas(simplificado))
+
+class CachePatrones:
+    def __init__(self, max_patrones: int = 128, directorio: Optional[str] = None, perezoso: bool = False):
+        if max_patrones < 1:
+            raise ValueError("La caché debe admitir al menos un patrón.")
+        self.max_patrones = max_patrones
+        self.directorio = directorio
+        # Sin construcción anticipada del AFD (--perezoso)
+        self.perezoso = perezoso
+        self.memoria: "OrderedDict[str, AutomatasCompilados]" = OrderedDict()
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        if directorio is not None:
+            os.makedirs(directorio, exist_ok=True)
+
+    def obtener(self, expresion: str) -> PatronCompilado:
+        postfix, simplificado = _postfix_de(expresion)
+        clave = '\x1f'.join(simplificado)
+
+        automatas = self.memoria.get(clave)
+        if automatas is not None:
+            self.memoria.move_to_end(clave)
+            self.aciertos_memoria += 1
+            contar('cache_aciertos_memoria')
+            return PatronCompilado(expresion, postfix, automatas)
+
+        with etapa('cache_disco'):
+            automatas = self._leer_disco(clave)
+        if automatas is not None:
+            self.aciertos_disco += 1
+            contar('cache_aciertos_disco')
+        else:
+            self.fallos += 1
+            contar('cache_fallos')
+            automatas = compilar_automatas(simplificado, self.perezoso)
+            with etapa('cache_disco'):
+                self._escribir_disco(clave, automatas)
+
+        self.memoria[clave] = automatas
+        if len(self.memoria) > self.max_patrones:
+            self.memoria.popitem(last=False)
+        return PatronCompilado(expresion, postfix, automatas)
+
+    def estadisticas(self) -> Dict[str, int]:
+        return {
+            'patrones_en_memoria': len(self.memoria),
+            'aciertos_memoria': self.aciertos_memoria,
+            'aciertos_disco': self.aciertos_disco,
+            'fallos': self.fallos,
+        }
+
+    def _ruta(self, clave: str) -> str:
+        resumen = hashlib.sha256(f"{VERSION_CACHE}\x1e{clave}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directorio, resumen + '.pkl')
+
+    def _leer_disco(self, clave: str) -> Optional[AutomatasCompilados]:
+        if self.directorio is None:
+            return None
+        try:
+            with open(self._ruta(clave), 'rb') as f:
+                version, clave_guardada, simplificado, afn, afd, afd_min = pickle.load(f)
+        except Exception:
+            # Entrada ausente, corrupta o de otro formato: se recompila
+            return None
+        if version != VERSION_CACHE or clave_guardada != clave:
+            return None
+        if afd_min is None and not self.perezoso:
+            # Guardada por una corrida perezosa: se recompila y se reescribe completa
+            return None
+        return AutomatasCompilados(simplificado, afn, afd, afd_min)
+
+    def _escribir_disco(self, clave: str, automatas: AutomatasCompilados):
+        if self.directorio is None:
+            return
+        # Los AFD que todavía no se construyeron se guardan como None
+        datos = (VERSION_CACHE, clave, automatas.postfix_simplificado, automatas.afn,
+                 automatas._afd, automatas._afd_min)
+        # Escritura atómica para que otro proceso nunca lea un archivo a medias
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(datos, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, self._ruta(clave))
+        except OSError:
+            if os.path.exists(temporal):
+                os.remove(temporal)
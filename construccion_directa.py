@@ -0,0 +1,110 @@
+# Construcción directa de AFD desde el postfix (método de Aho-Sethi-Ullman).
+# Cada símbolo del postfix es una posición; con anulable, primerapos,
+# ultimapos y siguientepos se obtiene el AFD sin pasar por un AFN.
+from typing import Dict, FrozenSet, List, Set
+from ShuntingYard import infix_to_postfix, expand_operators
+from simplificacion import simplificar_postfix
+from AFD import AFD
+from clases import ClasesEquivalencia
+
+# Etiqueta de la posición del marcador de fin en la expresión aumentada r·#
+MARCADOR_FIN = '#'
+
+class _Subexpresion:
+    def __init__(self, anulable: bool, primerapos: FrozenSet[int], ultimapos: FrozenSet[int]):
+        self.anulable = anulable
+        self.primerapos = primerapos
+        self.ultimapos = ultimapos
+
+def construir_afd_directo(postfijo_tokens: List[str]) -> AFD:
+    simbolos: List[str] = []
+    siguientepos: List[Set[int]] = []
+    pila: List[_Subexpresion] = []
+
+    def nueva_posicion(simbolo: str) -> _Subexpresion:
+        p = len(simbolos)
+        simbolos.append(simbolo)
+        siguientepos.append(set())
+        return _Subexpresion(False, frozenset((p,)), frozenset((p,)))
+
+    def concatenar(a: _Subexpresion, b: _Subexpresion) -> _Subexpresion:
+        for i in a.ultimapos:
+            siguientepos[i].update(b.primerapos)
+        primerapos = a.primerapos | b.primerapos if a.anulable else a.primerapos
+        ultimapos = a.ultimapos | b.ultimapos if b.anulable else b.ultimapos
+        return _Subexpresion(a.anulable and b.anulable, primerapos, ultimapos)
+
+    for tok in postfijo_tokens:
+        if tok in ('·', '|'):
+            if len(pila) < 2:
+                raise ValueError(f"Postfix inválido: faltan operandos para '{tok}'.")
+            b = pila.pop()
+            a = pila.pop()
+            if tok == '·':
+                pila.append(concatenar(a, b))
+            else:
+                pila.append(_Subexpresion(a.anulable or b.anulable,
+                                          a.primerapos | b.primerapos,
+                                          a.ultimapos | b.ultimapos))
+        elif tok in ('*', '+', '?'):
+            if not pila:
+                raise ValueError(f"Postfix inválido: falta operando para '{tok}'.")
+            a = pila.pop()
+            if tok in ('*', '+'):
+                for i in a.ultimapos:
+                    siguientepos[i].update(a.primerapos)
+            anulable = a.anulable if tok == '+' else True
+            pila.append(_Subexpresion(anulable, a.primerapos, a.ultimapos))
+        else:
+            simbolo = tok[1] if len(tok) == 2 and tok[0] == '\\' else tok
+            if len(simbolo) != 1 and not (len(simbolo) > 2 and simbolo[0] == '['):
+                raise ValueError(f"Token inesperado en postfix: {tok!r}")
+            if simbolo == '@':
+                # ε no ocupa posición
+                pila.append(_Subexpresion(True, frozenset(), frozenset()))
+            else:
+                pila.append(nueva_posicion(simbolo))
+
+    if len(pila) != 1:
+        raise ValueError("Expresión mal formada (postfix): pila no quedó con 1 elemento.")
+
+    # Expresión aumentada r·#
+    fin = len(simbolos)
+    raiz = concatenar(pila[0], nueva_posicion(MARCADOR_FIN))
+
+    # Las posiciones con clases se reparten entre las clases de equivalencia
+    clases = ClasesEquivalencia(set(simbolos[:fin]))
+
+    afd = AFD()
+    afd.clases = clases
+    S0 = raiz.primerapos
+    afd.estado_inicial = afd.crear_estado(S0, fin in S0)
+    indice: Dict[FrozenSet[int], int] = {S0: afd.estado_inicial}
+    pendientes: List[FrozenSet[int]] = [S0]
+
+    while pendientes:
+        T = pendientes.pop()
+        qT = indice[T]
+
+        # Agrupar siguientepos por la clase de equivalencia de cada posición del estado
+        por_clase: Dict[int, Set[int]] = {}
+        for p in T:
+            if p != fin:
+                for clase in clases.clases_de_simbolo[simbolos[p]]:
+                    por_clase.setdefault(clase, set()).update(siguientepos[p])
+
+        for clase in sorted(por_clase):
+            U = frozenset(por_clase[clase])
+            if U not in indice:
+                indice[U] = afd.crear_estado(U, fin in U)
+                pendientes.append(U)
+            afd.agregar_transicion(qT, clases.etiquetas[clase], indice[U])
+
+    afd.alfabeto = set(clases.etiquetas[1:])
+    return afd
+
+def construir_afd_directo_desde_expresion(expresion: str, simplificar: bool = True) -> AFD:
+    postfijo_tokens = infix_to_postfix(expand_operators(expresion))
+    if simplificar:
+        postfijo_tokens = simplificar_postfix(postfijo_tokens)
+    return construir_afd_directo(postfijo_tokens)
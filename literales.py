@@ -0,0 +1,161 @@
+# Literales obligatorios de una expresión regular: prefijo, sufijo y un
+# factor interno que toda cadena aceptada debe contener. Se calculan sobre
+# el árbol simplificado y permiten descartar entradas con str.find/startswith
+# antes de recorrer el autómata.
+from typing import Dict, FrozenSet, List, Optional
+from ShuntingYard import infix_to_postfix, expand_operators
+from simplificacion import Nodo, construir_arbol, simplificar_postfix
+from clases import conjunto_de_simbolo, es_clase
+
+# Tamaño máximo del conjunto de cadenas exactas que se sigue por nodo
+LIMITE_EXACTAS = 16
+
+class Literales:
+    def __init__(self, prefijo: str, sufijo: str, requerido: str,
+                 exactas: Optional[FrozenSet[str]] = None):
+        self.prefijo = prefijo
+        self.sufijo = sufijo
+        # Factor más largo que aparece en toda cadena aceptada
+        self.requerido = requerido
+        # Si no es None, el lenguaje completo (finito y pequeño)
+        self.exactas = exactas
+
+    def descarta(self, cadena: str) -> bool:
+        """True si la cadena no puede ser aceptada; False no garantiza que lo sea"""
+        if self.exactas is not None:
+            return cadena not in self.exactas
+        if not cadena.startswith(self.prefijo) or not cadena.endswith(self.sufijo):
+            return True
+        return cadena.find(self.requerido) < 0
+
+    def es_trivial(self) -> bool:
+        return self.exactas is None and not (self.prefijo or self.sufijo or self.requerido)
+
+class _Info:
+    __slots__ = ('exactas', 'prefijo', 'sufijo', 'requerido')
+
+    def __init__(self, exactas: Optional[FrozenSet[str]], prefijo: str, sufijo: str, requerido: str):
+        self.exactas = exactas
+        self.prefijo = prefijo
+        self.sufijo = sufijo
+        self.requerido = requerido
+
+_VACIA = _Info(None, '', '', '')
+
+def _prefijo_comun(cadenas) -> str:
+    cadenas = list(cadenas)
+    if not cadenas:
+        return ''
+    menor, mayor = min(cadenas), max(cadenas)
+    i = 0
+    while i < len(menor) and menor[i] == mayor[i]:
+        i += 1
+    return menor[:i]
+
+def _sufijo_comun(cadenas) -> str:
+    return _prefijo_comun(c[::-1] for c in cadenas)[::-1]
+
+def _factor_comun(a: str, b: str) -> str:
+    # Subcadena común más larga; las cadenas son cortas (literales del patrón)
+    if not a or not b:
+        return ''
+    mejor_fin, mejor_largo = 0, 0
+    previa = [0] * (len(b) + 1)
+    for i in range(1, len(a) + 1):
+        actual = [0] * (len(b) + 1)
+        for j in range(1, len(b) + 1):
+            if a[i - 1] == b[j - 1]:
+                actual[j] = previa[j - 1] + 1
+                if actual[j] > mejor_largo:
+                    mejor_fin, mejor_largo = i, actual[j]
+        previa = actual
+    return a[mejor_fin - mejor_largo:mejor_fin]
+
+def _factor_de_todas(cadenas: FrozenSet[str]) -> str:
+    cadenas = sorted(cadenas, key=len)
+    factor = cadenas[0]
+    for c in cadenas[1:]:
+        factor = _factor_comun(factor, c)
+    return factor
+
+def _desde_exactas(exactas: FrozenSet[str]) -> _Info:
+    return _Info(exactas, _prefijo_comun(exactas), _sufijo_comun(exactas), _factor_de_todas(exactas))
+
+def _mas_largo(*candidatos: str) -> str:
+    return max(candidatos, key=len)
+
+def _concatenar(a: _Info, b: _Info) -> _Info:
+    if a.exactas is not None and b.exactas is not None and \
+            len(a.exactas) * len(b.exactas) <= LIMITE_EXACTAS:
+        return _desde_exactas(frozenset(x + y for x in a.exactas for y in b.exactas))
+    # Toda cadena es u·v con u de a y v de b
+    prefijo = _prefijo_comun(x + b.prefijo for x in a.exactas) if a.exactas is not None else a.prefijo
+    sufijo = _sufijo_comun(a.sufijo + y for y in b.exactas) if b.exactas is not None else b.sufijo
+    requerido = _mas_largo(a.requerido, b.requerido, a.sufijo + b.prefijo, prefijo, sufijo)
+    return _Info(None, prefijo, sufijo, requerido)
+
+def _unir(a: _Info, b: _Info) -> _Info:
+    if a.exactas is not None and b.exactas is not None and \
+            len(a.exactas) + len(b.exactas) <= LIMITE_EXACTAS:
+        return _desde_exactas(a.exactas | b.exactas)
+    return _Info(None,
+                 _prefijo_comun((a.prefijo, b.prefijo)),
+                 _sufijo_comun((a.sufijo, b.sufijo)),
+                 _factor_comun(a.requerido, b.requerido))
+
+def _analizar(raiz: Nodo) -> _Info:
+    # Postorden iterativo; el árbol comparte subárboles, así que se memoriza por id
+    info: Dict[int, _Info] = {}
+    pila: List = [raiz]
+    while pila:
+        nodo = pila[-1]
+        if nodo.id in info:
+            pila.pop()
+            continue
+        pendientes = [h for h in nodo.hijos if h.id not in info]
+        if pendientes:
+            pila.extend(pendientes)
+            continue
+        pila.pop()
+
+        if nodo.op == 'eps':
+            resultado = _Info(frozenset(('',)), '', '', '')
+        elif nodo.op == 'sim':
+            v = nodo.valor
+            c = v[1] if len(v) == 2 and v[0] == '\\' else v
+            if not es_clase(c):
+                resultado = _Info(frozenset((c,)), c, c, c)
+            else:
+                # Una clase pequeña equivale a la unión de sus caracteres
+                rangos = conjunto_de_simbolo(c).rangos
+                if sum(hi - lo + 1 for lo, hi in rangos) <= LIMITE_EXACTAS:
+                    resultado = _desde_exactas(frozenset(chr(x) for lo, hi in rangos
+                                                         for x in range(lo, hi + 1)))
+                else:
+                    resultado = _VACIA
+        elif nodo.op == '·':
+            resultado = _concatenar(info[nodo.hijos[0].id], info[nodo.hijos[1].id])
+        elif nodo.op == '|':
+            resultado = info[nodo.hijos[0].id]
+            for h in nodo.hijos[1:]:
+                resultado = _unir(resultado, info[h.id])
+        elif nodo.op == '?':
+            a = info[nodo.hijos[0].id]
+            if a.exactas is not None and len(a.exactas) < LIMITE_EXACTAS:
+                resultado = _desde_exactas(a.exactas | {''})
+            else:
+                resultado = _VACIA
+        elif nodo.op == '+':
+            a = info[nodo.hijos[0].id]
+            resultado = _Info(None, a.prefijo, a.sufijo, a.requerido)
+        else:
+            resultado = _VACIA
+        info[nodo.id] = resultado
+    return info[raiz.id]
+
+def extraer_literales(postfix: List[str]) -> Literales:
+    info = _analizar(construir_arbol(postfix))
+    return Literales(info.prefijo, info.sufijo, info.requerido, info.exactas)
+
+def literales_de_expresion(expresion: str) -> Literales:
+    return extraer_literales(simplificar_postfix(infix_to_postfix(expand_operators(expresion))))
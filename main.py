@@ -1,12 +1,23 @@
 # main.py
+import os
 import sys
-from ShuntingYard import infix_to_postfix as convertir_expresion
-from AFN import construir_afn_desde_expresion, simular_afn
-from AFD import convertir_afn_a_afd, simular_afd
-from minimizacion import minimizar_afd, obtener_info_minimizacion
-from visualizacion import visualizar_automatas, crear_directorio_graficos
+import time
+from itertools import islice
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from AFN import simular_afn, simular_afn_bits
+from AFD import AFD, simular_afd, simular_tabla, simular_afd_perezoso
+from minimizacion import obtener_info_minimizacion
+from compilacion import CachePatrones, DIRECTORIO_CACHE, normalizar_expresion
+from visualizacion import ColaGraficos, PROCESOS_GRAFICOS, crear_directorio_graficos, configurar_graficos
+import perfil
+from perfil import Perfilador, etapa
 
 SEPARADORES = ['=>', ';', '\t']
+# Líneas por tarea en el modo paralelo; los grupos grandes se reparten en lotes
+TAMANO_LOTE = 2000
+# Segundos entre consultas del modo --watch
+INTERVALO_VIGILANCIA = 0.5
 
 def parse_linea(linea: str):
     raw = linea.strip()
@@ -32,6 +43,30 @@ def parse_linea(linea: str):
 
     return expr, cad
 
+# Etapas del pipeline en streaming: cada una consume la anterior de forma
+# perezosa, así que el archivo nunca se carga completo en memoria
+def leer_lineas(nombre_archivo: str):
+    """Genera (número de línea, línea) leyendo el archivo bajo demanda"""
+    with open(nombre_archivo, 'r', encoding='utf-8') as f:
+        for num_linea, linea in enumerate(f, 1):
+            yield num_linea, linea
+
+def parsear_lineas(lineas):
+    """Genera (número de línea, expresión, cadena) omitiendo vacías y comentarios"""
+    for num_linea, linea in lineas:
+        with etapa('parseo'):
+            expr, cadena = parse_linea(linea)
+        if expr is not None:
+            yield num_linea, expr, cadena
+
+def compilar_lineas(entradas, cache: CachePatrones):
+    """Agrega a cada entrada su patrón compilado, o el error de compilación"""
+    for num_linea, expr, cadena in entradas:
+        try:
+            yield num_linea, expr, cadena, cache.obtener(expr), None
+        except Exception as e:
+            yield num_linea, expr, cadena, None, e
+
 def mostrar_estadisticas_automata(automata, tipo: str):
     """Muestra estadísticas básicas del autómata"""
     if tipo == "AFN":
@@ -39,27 +74,91 @@ def mostrar_estadisticas_automata(automata, tipo: str):
     else:  # AFD
         print(f"{tipo}: estados={len(automata.estados)}, inicial={automata.estado_inicial}, finales={sorted(list(automata.estados_finales))}, alfabeto={sorted(list(automata.alfabeto))}")
 
-def simular_todos_automatas(afn, afd, afd_min, cadena: str):
+def simular_todos_automatas(afn, afd, afd_min, cadena: str, tabla=None, bits=None, literales=None):
     """Simula la cadena en todos los autómatas y muestra resultados"""
-    resultado_afn = simular_afn(afn, cadena)
+    if literales is not None and literales.descarta(cadena):
+        print("Prefiltro de literales:   RECHAZA (sin recorrer los autómatas)")
+        return False, False, False
+
+    if bits is not None:
+        resultado_afn = simular_afn_bits(bits, cadena)
+    else:
+        resultado_afn = simular_afn(afn, cadena)
+    if bits is not None:
+        print(f"Simulación AFN (bits):    {'ACEPTA' if resultado_afn else 'RECHAZA'}")
+    else:
+        print(f"Simulación AFN:           {'ACEPTA' if resultado_afn else 'RECHAZA'}")
+    # Con --perezoso no hay AFD construido de antemano
+    if afd is None:
+        return resultado_afn, None, None
+
     resultado_afd = simular_afd(afd, cadena)
-    resultado_afd_min = simular_afd(afd_min, cadena)
-    
-    print(f"Simulación AFN:           {'ACEPTA' if resultado_afn else 'RECHAZA'}")
+    if tabla is not None:
+        resultado_afd_min = simular_tabla(tabla, cadena)
+    else:
+        resultado_afd_min = simular_afd(afd_min, cadena)
     print(f"Simulación AFD:           {'ACEPTA' if resultado_afd else 'RECHAZA'}")
-    print(f"Simulación AFD minimizado:{'ACEPTA' if resultado_afd_min else 'RECHAZA'}")
+    if tabla is not None:
+        print(f"Simulación AFD (tabla):   {'ACEPTA' if resultado_afd_min else 'RECHAZA'}")
+    else:
+        print(f"Simulación AFD minimizado:{'ACEPTA' if resultado_afd_min else 'RECHAZA'}")
     
     return resultado_afn, resultado_afd, resultado_afd_min
 
 
-def procesar_archivo(nombre_archivo: str, generar_graficos: bool = True):    
+def contar_transiciones(automata) -> int:
+    if isinstance(automata, AFD):
+        return sum(len(t) for t in automata.transiciones.values())
+    return sum(len(ds) for e in automata.estados.values() for ds in e.transiciones.values())
+
+def datos_de_perfil(expr: str, patron, resultado, error) -> dict:
+    """Tamaños de los autómatas y resultado de la línea para el registro del perfil"""
+    datos = {'expresion': expr, 'acepta': resultado, 'error': None if error is None else str(error)}
+    if patron is not None:
+        automatas = {'afn': patron.afn}
+        if patron.automatas.afd_construido:
+            automatas.update(afd=patron.afd, afd_min=patron.afd_min)
+        datos['estados'] = {k: len(a.estados) for k, a in automatas.items()}
+        datos['transiciones'] = {k: contar_transiciones(a) for k, a in automatas.items()}
+    return datos
+
+def mostrar_estadisticas_finales(estadisticas_globales: dict):
+    """Muestra el resumen de todas las líneas procesadas"""
+    print(f"\n{'='*60}")
+    print("ESTADÍSTICAS FINALES")
+    print(f"{'='*60}")
+    print(f"Total procesadas: {estadisticas_globales['total_procesadas']}")
+    print(f"Cadenas aceptadas: {estadisticas_globales['total_aceptadas']}")
+    print(f"Cadenas rechazadas: {estadisticas_globales['total_rechazadas']}")
+    print(f"Errores encontrados: {estadisticas_globales['errores']}")
+
+def procesar_archivo(nombre_archivo: str, generar_graficos: bool = True, usar_tabla: bool = False,
+                     usar_bits: bool = False, usar_perezoso: bool = False,
+                     cache_disco: bool = False, usar_prefiltro: bool = False,
+                     perfil_salida: Optional[str] = None,
+                     procesos_graficos: Optional[int] = PROCESOS_GRAFICOS,
+                     perfil_memoria: bool = True):    
+    # Las imágenes se dibujan en segundo plano mientras se simulan las líneas
+    cola_graficos = None
     if generar_graficos:
         crear_directorio_graficos()
+        cola_graficos = ColaGraficos(procesos_graficos)
+
+    # Las expresiones repetidas se compilan una sola vez
+    # Con --perezoso la caché no construye el AFD ni lo minimiza
+    cache = CachePatrones(directorio=DIRECTORIO_CACHE if cache_disco else None, perezoso=usar_perezoso)
+
+    # Métricas por línea en JSONL; sin --perfil las etapas no miden nada
+    perfilador = None
+    archivo_perfil = None
+    if perfil_salida is not None:
+        archivo_perfil = open(perfil_salida, 'w', encoding='utf-8')
+        perfilador = Perfilador(archivo_perfil, memoria=perfil_memoria)
+        perfil.activar(perfilador)
     
     try:
         print(f"Leyendo archivo: {nombre_archivo}")
-        with open(nombre_archivo, 'r', encoding='utf-8') as f:
-            lineas = f.readlines()
+        entradas = compilar_lineas(parsear_lineas(leer_lineas(nombre_archivo)), cache)
 
         estadisticas_globales = {
             'total_procesadas': 0,
@@ -68,54 +167,88 @@ def procesar_archivo(nombre_archivo: str, generar_graficos: bool = True):
             'errores': 0
         }
 
-        for num_linea, linea in enumerate(lineas, 1):
+        for num_linea, expr, cadena, patron, error_compilacion in entradas:
+            resultado_afn = None
+            error_linea = error_compilacion
             try:
-                expr, cadena = parse_linea(linea)
-                if expr is None:
-                    continue
-
                 print(f"\n{'='*60}")
                 print(f"LÍNEA {num_linea}")
                 print(f"{'='*60}")
                 print(f"Expresión regular: {expr}")
                 print(f"Cadena a evaluar: {repr(cadena) if cadena != '' else '(cadena vacía)'}")
 
+                if error_compilacion is not None:
+                    raise error_compilacion
+                afn = patron.afn
+
                 #Conversión a postfix
                 print(f"\n1. CONVERSIÓN A POSTFIX:")
-                postfix = convertir_expresion(expr)
-                print(f"   Postfix: {postfix}")
+                print(f"   Postfix: {patron.postfix}")
+                if patron.postfix_simplificado != patron.postfix:
+                    print(f"   Postfix simplificado: {patron.postfix_simplificado}")
 
                 #Construcción de AFN
                 print(f"\n2. CONSTRUCCIÓN DE AFN (Thompson):")
-                afn = construir_afn_desde_expresion(expr)
                 mostrar_estadisticas_automata(afn, "AFN")
 
-                #Conversión a AFD
-                print(f"\n3. CONSTRUCCIÓN DE AFD (Subconjuntos):")
-                afd = convertir_afn_a_afd(afn)
-                mostrar_estadisticas_automata(afd, "AFD")
-
-                # Minimización de AFD
-                print(f"\n4. MINIMIZACIÓN DE AFD:")
-                afd_minimizado = minimizar_afd(afd)
-                mostrar_estadisticas_automata(afd_minimizado, "AFD minimizado")
-                
-                # Información adicional sobre minimización
-                info_min = obtener_info_minimizacion(afd, afd_minimizado)
-                print(info_min)
-
-                #Simulación
-                print(f"\n5. SIMULACIÓN:")
-                resultado_afn, resultado_afd, resultado_afd_min = simular_todos_automatas(
-                    afn, afd, afd_minimizado, cadena
-                )
+                if usar_perezoso:
+                    # Los estados del AFD se construyen bajo demanda al simular
+                    afd = afd_minimizado = None
+                    print(f"\n3. CONSTRUCCIÓN DE AFD: bajo demanda (--perezoso)")
+                else:
+                    afd = patron.afd
+                    afd_minimizado = patron.afd_min
+
+                    #Conversión a AFD
+                    print(f"\n3. CONSTRUCCIÓN DE AFD (Subconjuntos):")
+                    mostrar_estadisticas_automata(afd, "AFD")
+
+                    # Minimización de AFD
+                    print(f"\n4. MINIMIZACIÓN DE AFD (Hopcroft):")
+                    mostrar_estadisticas_automata(afd_minimizado, "AFD minimizado")
+
+                    # Información adicional sobre minimización
+                    info_min = obtener_info_minimizacion(afd, afd_minimizado)
+                    print(info_min)
+
+                with etapa('simulacion'):
+                    # Compilación a tabla de transiciones
+                    tabla = None
+                    if usar_tabla and afd_minimizado is not None:
+                        tabla = patron.tabla
+                        print(f"   Tabla compilada: filas={tabla.num_estados}, clases={tabla.num_clases}")
+
+                    # Máscaras de bits para la simulación del AFN
+                    bits = patron.bits if usar_bits else None
+
+                    #Simulación
+                    print(f"\n5. SIMULACIÓN:")
+                    resultado_afn, resultado_afd, resultado_afd_min = simular_todos_automatas(
+                        afn, afd, afd_minimizado, cadena, tabla, bits,
+                        patron.literales if usar_prefiltro else None
+                    )
+
+                    # Simulación con AFD perezoso (subconjuntos bajo demanda)
+                    # El AFD perezoso es del patrón: sus estados se reutilizan entre líneas
+                    if usar_perezoso:
+                        perezoso = patron.perezoso
+                        antes = perezoso.estadisticas()
+                        resultado_perezoso = simular_afd_perezoso(perezoso, cadena)
+                        stats = perezoso.estadisticas()
+                        print(f"Simulación AFD perezoso:  {'ACEPTA' if resultado_perezoso else 'RECHAZA'}")
+                        print(f"   Caché: estados={stats['estados_en_cache']}, aciertos={stats['aciertos']}, fallos={stats['fallos']}")
+                        if perfilador is not None:
+                            perfilador.contar('perezoso_aciertos', stats['aciertos'] - antes['aciertos'])
+                            perfilador.contar('perezoso_fallos', stats['fallos'] - antes['fallos'])
 
                 #Generación de gráficos
                 if generar_graficos:
                     print(f"\n6. GENERACIÓN DE GRÁFICOS:")
                     try:
-                        visualizar_automatas(afn, afd, afd_minimizado, expr, num_linea)
-                        print("   Gráficos generados exitosamente")
+                        with etapa('graficos'):
+                            resultados_graficos = cola_graficos.encolar(afn, afd, afd_minimizado, expr, num_linea)
+                        for resultado in resultados_graficos:
+                            print(f"   ✓ {resultado}")
                     except Exception as e:
                         print(f"   Error al generar gráficos: {e}")
 
@@ -129,26 +262,281 @@ def procesar_archivo(nombre_archivo: str, generar_graficos: bool = True):
             except Exception as e:
                 print(f"\n❌ ERROR en línea {num_linea}: {e}")
                 estadisticas_globales['errores'] += 1
+                error_linea = e
                 continue
+            finally:
+                if perfilador is not None:
+                    perfilador.terminar_linea(num_linea, **datos_de_perfil(expr, patron, resultado_afn, error_linea))
 
         # Mostrar estadísticas finales
-        print(f"\n{'='*60}")
-        print("ESTADÍSTICAS FINALES")
-        print(f"{'='*60}")
-        print(f"Total procesadas: {estadisticas_globales['total_procesadas']}")
-        print(f"Cadenas aceptadas: {estadisticas_globales['total_aceptadas']}")
-        print(f"Cadenas rechazadas: {estadisticas_globales['total_rechazadas']}")
-        print(f"Errores encontrados: {estadisticas_globales['errores']}")
+        mostrar_estadisticas_finales(estadisticas_globales)
+        stats_cache = cache.estadisticas()
+        print(f"Caché de patrones: compilados={stats_cache['fallos']}, "
+              f"reutilizados={stats_cache['aciertos_memoria']}, desde disco={stats_cache['aciertos_disco']}")
+        if cola_graficos is not None:
+            print("Esperando a que terminen los gráficos...")
+            stats_graficos = cola_graficos.cerrar()
+            print(f"Gráficos: dibujados={stats_graficos['dibujadas']}, "
+                  f"reutilizados={stats_graficos['reutilizadas']}, errores={stats_graficos['errores']}")
+            for destino, error in cola_graficos.errores:
+                print(f"   Error al generar {destino}: {error}")
+        if perfilador is not None:
+            perfilador.mostrar_resumen()
+            print(f"Métricas por línea guardadas en {perfil_salida}")
+
+    except FileNotFoundError:
+        print(f"Error: No se pudo encontrar el archivo '{nombre_archivo}'")
+    except Exception as e:
+        print(f"Error al procesar el archivo: {e}")
+    finally:
+        if cola_graficos is not None:
+            cola_graficos.cerrar()
+        if perfilador is not None:
+            perfil.desactivar()
+            archivo_perfil.close()
+
+# Caché propia de cada proceso trabajador: un patrón se compila como mucho
+# una vez por proceso aunque su grupo se reparta en varios lotes
+_cache_trabajador = None
+_prefiltro_trabajador = False
+
+def _iniciar_trabajador(cache_disco: bool, usar_prefiltro: bool = False):
+    global _cache_trabajador, _prefiltro_trabajador
+    _cache_trabajador = CachePatrones(directorio=DIRECTORIO_CACHE if cache_disco else None)
+    _prefiltro_trabajador = usar_prefiltro
+
+def _procesar_lote(expr: str, lote):
+    """Compila (o reutiliza) la expresión y simula cada cadena del lote"""
+    try:
+        patron = _cache_trabajador.obtener(expr)
+    except Exception as e:
+        return [(num_linea, None, str(e)) for num_linea, _ in lote]
+
+    literales = patron.literales if _prefiltro_trabajador and not patron.literales.es_trivial() else None
+    resultados = []
+    for num_linea, cadena in lote:
+        if literales is not None and literales.descarta(cadena):
+            resultados.append((num_linea, (False, False, False), None))
+            continue
+        try:
+            resultado = (simular_afn(patron.afn, cadena),
+                         simular_afd(patron.afd, cadena),
+                         simular_afd(patron.afd_min, cadena))
+            resultados.append((num_linea, resultado, None))
+        except Exception as e:
+            resultados.append((num_linea, None, str(e)))
+    return resultados
+
+def _enviar_ventana(pool, ventana):
+    """Agrupa por expresión las líneas de la ventana y envía sus lotes al pool"""
+    grupos = {}
+    claves = {}
+    for num_linea, expr, cadena in ventana:
+        if expr not in claves:
+            try:
+                claves[expr] = normalizar_expresion(expr)
+            except ValueError:
+                # El error se informa al compilar dentro del trabajador
+                claves[expr] = expr
+        clave = claves[expr]
+        if clave not in grupos:
+            grupos[clave] = (expr, [])
+        grupos[clave][1].append((num_linea, cadena))
+
+    futuros = []
+    for expr, miembros in grupos.values():
+        for i in range(0, len(miembros), TAMANO_LOTE):
+            futuros.append(pool.submit(_procesar_lote, expr, miembros[i:i + TAMANO_LOTE]))
+    return ventana, futuros
+
+def procesar_archivo_paralelo(nombre_archivo: str, workers: int, cache_disco: bool = False,
+                              usar_prefiltro: bool = False):
+    """Procesa el archivo por ventanas: dentro de cada una agrupa las líneas por
+    expresión y reparte los lotes entre un pool de procesos. Mientras se emite una
+    ventana ya se está calculando la siguiente; la salida sale en orden de entrada"""
+    try:
+        print(f"Leyendo archivo: {nombre_archivo}")
+        entradas = parsear_lineas(leer_lineas(nombre_archivo))
+        tamano_ventana = TAMANO_LOTE * workers
+
+        estadisticas_globales = {
+            'total_procesadas': 0,
+            'total_aceptadas': 0,
+            'total_rechazadas': 0,
+            'errores': 0
+        }
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_trabajador,
+                                 initargs=(cache_disco, usar_prefiltro)) as pool:
+            siguiente = _enviar_ventana(pool, list(islice(entradas, tamano_ventana)))
+            while siguiente[0]:
+                ventana, futuros = siguiente
+                siguiente = _enviar_ventana(pool, list(islice(entradas, tamano_ventana)))
+
+                resultados = {}
+                for futuro in futuros:
+                    for num_linea, resultado, error in futuro.result():
+                        resultados[num_linea] = (resultado, error)
+
+                # Fusión en orden de entrada para que la salida sea determinista
+                for num_linea, expr, cadena in ventana:
+                    resultado, error = resultados[num_linea]
+                    if error is not None:
+                        print(f"❌ ERROR en línea {num_linea}: {error}")
+                        estadisticas_globales['errores'] += 1
+                        continue
+                    resultado_afn, resultado_afd, resultado_afd_min = resultado
+                    print(f"LÍNEA {num_linea}: {expr} => {repr(cadena) if cadena != '' else '(cadena vacía)'} | "
+                          f"AFN: {'ACEPTA' if resultado_afn else 'RECHAZA'}, "
+                          f"AFD: {'ACEPTA' if resultado_afd else 'RECHAZA'}, "
+                          f"AFD minimizado: {'ACEPTA' if resultado_afd_min else 'RECHAZA'}")
+                    estadisticas_globales['total_procesadas'] += 1
+                    if resultado_afn:
+                        estadisticas_globales['total_aceptadas'] += 1
+                    else:
+                        estadisticas_globales['total_rechazadas'] += 1
+
+        mostrar_estadisticas_finales(estadisticas_globales)
 
     except FileNotFoundError:
         print(f"Error: No se pudo encontrar el archivo '{nombre_archivo}'")
     except Exception as e:
         print(f"Error al procesar el archivo: {e}")
 
+def _evaluar_linea(expr: str, cadena: str, cache: CachePatrones, usar_prefiltro: bool):
+    """Compila (o reutiliza) la expresión y simula la cadena: (patrón, resultado, error)"""
+    try:
+        patron = cache.obtener(expr)
+    except Exception as e:
+        return None, None, e
+    if usar_prefiltro and patron.literales.descarta(cadena):
+        return patron, (False, False, False), None
+    try:
+        return patron, (simular_afn(patron.afn, cadena),
+                        simular_afd(patron.afd, cadena),
+                        simular_afd(patron.afd_min, cadena)), None
+    except Exception as e:
+        return patron, None, e
+
+def _actualizar_vigilancia(nombre_archivo: str, memo: dict, cache: CachePatrones,
+                           usar_prefiltro: bool, cola_graficos) -> dict:
+    """Relee el archivo y evalúa sólo las líneas cuyo contenido no estaba en memo.
+    Devuelve el memo de la versión actual (las líneas eliminadas salen de él)"""
+    inicio = time.perf_counter()
+    with open(nombre_archivo, 'r', encoding='utf-8') as f:
+        lineas = f.read().splitlines()
+
+    # La clave es el texto de la línea sin espacios de los extremos; el dict la
+    # indexa por su hash, así que una línea que sólo cambió de lugar no se recalcula
+    actual = {}
+    cambiadas = 0
+    for num_linea, linea in enumerate(lineas, 1):
+        clave = linea.strip()
+        entrada = actual.get(clave)
+        if entrada is None:
+            entrada = memo.get(clave)
+            nueva = entrada is None
+            if nueva:
+                expr, cadena = parse_linea(linea)
+                if expr is None:
+                    entrada = (None, None, None, None)
+                else:
+                    patron, resultado, error = _evaluar_linea(expr, cadena, cache, usar_prefiltro)
+                    entrada = (expr, cadena, resultado, error)
+                    if cola_graficos is not None and patron is not None:
+                        cola_graficos.encolar(patron.afn, patron.afd, patron.afd_min, expr, num_linea)
+            actual[clave] = entrada
+        else:
+            # Repetida dentro del archivo: es nueva si su primera aparición lo fue
+            nueva = clave not in memo
+
+        expr, cadena, resultado, error = entrada
+        if not nueva or expr is None:
+            continue
+        cambiadas += 1
+        if error is not None:
+            print(f"❌ ERROR en línea {num_linea}: {error}")
+        else:
+            resultado_afn, resultado_afd, resultado_afd_min = resultado
+            print(f"LÍNEA {num_linea}: {expr} => {repr(cadena) if cadena != '' else '(cadena vacía)'} | "
+                  f"AFN: {'ACEPTA' if resultado_afn else 'RECHAZA'}, "
+                  f"AFD: {'ACEPTA' if resultado_afd else 'RECHAZA'}, "
+                  f"AFD minimizado: {'ACEPTA' if resultado_afd_min else 'RECHAZA'}")
+
+    eliminadas = sum(1 for clave, entrada in memo.items() if entrada[0] is not None and clave not in actual)
+    if cambiadas or eliminadas:
+        aceptadas = sum(1 for e in actual.values() if e[0] is not None and e[3] is None and e[2][0])
+        errores = sum(1 for e in actual.values() if e[0] is not None and e[3] is not None)
+        print(f"[{time.strftime('%H:%M:%S')}] {cambiadas} líneas nuevas o cambiadas, {eliminadas} eliminadas "
+              f"en {(time.perf_counter() - inicio) * 1000:.1f} ms "
+              f"(distintas: aceptadas={aceptadas}, errores={errores})")
+    return actual
+
+def vigilar_archivo(nombre_archivo: str, intervalo: float = INTERVALO_VIGILANCIA,
+                    generar_graficos: bool = False, cache_disco: bool = False,
+                    usar_prefiltro: bool = False, procesos_graficos: Optional[int] = PROCESOS_GRAFICOS):
+    """Modo --watch: consulta el archivo cada `intervalo` segundos y reprocesa sólo
+    las líneas nuevas o cambiadas. Los patrones compilados y los resultados por
+    línea quedan en memoria entre una versión y la siguiente"""
+    cache = CachePatrones(directorio=DIRECTORIO_CACHE if cache_disco else None)
+    cola_graficos = None
+    if generar_graficos:
+        crear_directorio_graficos()
+        cola_graficos = ColaGraficos(procesos_graficos)
+
+    memo = {}
+    firma = None
+    print(f"Vigilando {nombre_archivo} cada {intervalo:g} s (Ctrl+C para terminar)")
+    try:
+        while True:
+            # Se compara tamaño y fecha de modificación; leer el archivo sólo si cambian
+            try:
+                info = os.stat(nombre_archivo)
+                nueva_firma = (info.st_mtime_ns, info.st_size)
+            except FileNotFoundError:
+                if firma != 'faltante':
+                    print(f"Esperando a que exista '{nombre_archivo}'...")
+                    firma = 'faltante'
+                nueva_firma = None
+
+            if nueva_firma is not None and nueva_firma != firma:
+                firma = nueva_firma
+                try:
+                    memo = _actualizar_vigilancia(nombre_archivo, memo, cache, usar_prefiltro, cola_graficos)
+                except (OSError, UnicodeDecodeError) as e:
+                    # Archivo a medio guardar: se reintenta en la próxima consulta
+                    print(f"Error al leer el archivo: {e}")
+                    firma = None
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        print("\nVigilancia terminada")
+    finally:
+        if cola_graficos is not None:
+            cola_graficos.cerrar()
+
+def leer_opcion_entera(nombre: str, argumentos):
+    """Lee una opción '--nombre N' o '--nombre=N'; devuelve None si no está"""
+    for i, arg in enumerate(argumentos):
+        if arg == nombre and i + 1 < len(argumentos):
+            return int(argumentos[i + 1])
+        if arg.startswith(nombre + "="):
+            return int(arg.split("=", 1)[1])
+    return None
+
 if __name__ == "__main__":
     # Procesar argumentos del archivo
     archivo = "expresiones.txt"
     generar_graficos = True
+    usar_tabla = False
+    usar_bits = False
+    usar_perezoso = False
+    cache_disco = False
+    usar_prefiltro = False
+    perfil_salida = None
+    perfil_memoria = True
+    workers = None
+    intervalo_vigilancia = None
+    procesos_graficos = PROCESOS_GRAFICOS
     
     if len(sys.argv) > 1:
         for arg in sys.argv[1:]:
@@ -158,6 +546,91 @@ if __name__ == "__main__":
         
         if "--no-graficos" in sys.argv:
             generar_graficos = False
+
+        if "--tabla" in sys.argv:
+            usar_tabla = True
+
+        if "--bits" in sys.argv:
+            usar_bits = True
+
+        if "--perezoso" in sys.argv:
+            usar_perezoso = True
+
+        if "--cache-disco" in sys.argv:
+            cache_disco = True
+
+        if "--prefiltro" in sys.argv:
+            usar_prefiltro = True
+
+        # --perfil escribe en perfil.jsonl; --perfil=ruta elige otro archivo
+        for arg in sys.argv[1:]:
+            if arg == "--perfil":
+                perfil_salida = "perfil.jsonl"
+            elif arg.startswith("--perfil="):
+                perfil_salida = arg.split("=", 1)[1]
+
+        # Sin tracemalloc los tiempos del perfil no se inflan, pero no hay memoria_pico
+        if "--perfil-sin-memoria" in sys.argv:
+            perfil_memoria = False
+            if perfil_salida is None:
+                perfil_salida = "perfil.jsonl"
+
+        # --watch vigila el archivo; --watch=S consulta cada S segundos
+        for arg in sys.argv[1:]:
+            if arg == "--watch":
+                intervalo_vigilancia = INTERVALO_VIGILANCIA
+            elif arg.startswith("--watch="):
+                try:
+                    intervalo_vigilancia = float(arg.split("=", 1)[1])
+                except ValueError:
+                    print("Error: --watch= requiere un número de segundos")
+                    sys.exit(1)
+                if intervalo_vigilancia <= 0:
+                    print("Error: el intervalo de --watch debe ser positivo")
+                    sys.exit(1)
+
+        try:
+            workers = leer_opcion_entera("--workers", sys.argv)
+        except ValueError:
+            print("Error: --workers requiere un número entero")
+            sys.exit(1)
+
+        # --procesos-graficos 0 dibuja en el mismo proceso, sin pool
+        try:
+            valor = leer_opcion_entera("--procesos-graficos", sys.argv)
+        except ValueError:
+            print("Error: --procesos-graficos requiere un número entero")
+            sys.exit(1)
+        if valor is not None:
+            if valor < 0:
+                print("Error: --procesos-graficos no puede ser negativo")
+                sys.exit(1)
+            procesos_graficos = valor
+
+        # Salida de las imágenes: --dpi N, --formato png|svg|pdf|jpg y
+        # --limite-detalle N (estados a partir de los cuales se simplifica el dibujo)
+        formato_graficos = None
+        for i, arg in enumerate(sys.argv):
+            if arg == "--formato" and i + 1 < len(sys.argv):
+                formato_graficos = sys.argv[i + 1]
+            elif arg.startswith("--formato="):
+                formato_graficos = arg.split("=", 1)[1]
+        opciones_enteras = {}
+        for opcion in ("--dpi", "--limite-detalle"):
+            try:
+                opciones_enteras[opcion] = leer_opcion_entera(opcion, sys.argv)
+            except ValueError:
+                print(f"Error: {opcion} requiere un número entero")
+                sys.exit(1)
+        try:
+            configurar_graficos(opciones_enteras["--dpi"], formato_graficos,
+                                opciones_enteras["--limite-detalle"])
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if workers is not None and workers < 1:
+            print("Error: --workers debe ser al menos 1")
+            sys.exit(1)
     
     print("=== ANALIZADOR LÉXICO - TEORÍA DE LA COMPUTACIÓN ===")
     print(f"Procesando archivo: {archivo}")
@@ -165,5 +638,32 @@ if __name__ == "__main__":
         print("Generación de gráficos: HABILITADA")
     else:
         print("Generación de gráficos: DESHABILITADA")
+    if usar_tabla:
+        print("Simulación con tabla compilada: HABILITADA")
+    if usar_bits:
+        print("Simulación AFN con máscaras de bits: HABILITADA")
+    if usar_perezoso:
+        print("Simulación con AFD perezoso: HABILITADA (sin construir ni minimizar el AFD)")
+        if usar_tabla:
+            print("Advertencia: --tabla necesita el AFD minimizado y no se aplica con --perezoso")
+    if cache_disco:
+        print(f"Caché de patrones en disco: {DIRECTORIO_CACHE}")
+    if usar_prefiltro:
+        print("Prefiltro de literales obligatorios: HABILITADO")
+    if perfil_salida is not None:
+        if workers is not None:
+            print("Advertencia: --perfil sólo se aplica al procesamiento secuencial")
+        else:
+            print(f"Perfil por etapas: {perfil_salida}" + ("" if perfil_memoria else " (sin memoria)"))
     
-    procesar_archivo(archivo, generar_graficos)
\ No newline at end of file
+    if intervalo_vigilancia is not None:
+        if workers is not None or perfil_salida is not None:
+            print("Advertencia: --workers y --perfil no se aplican al modo --watch")
+        vigilar_archivo(archivo, intervalo_vigilancia, generar_graficos, cache_disco, usar_prefiltro,
+                        procesos_graficos)
+    elif workers is not None:
+        print(f"Procesamiento paralelo: {workers} procesos (sin gráficos)")
+        procesar_archivo_paralelo(archivo, workers, cache_disco, usar_prefiltro)
+    else:
+        procesar_archivo(archivo, generar_graficos, usar_tabla, usar_bits, usar_perezoso, cache_disco,
+                         usar_prefiltro, perfil_salida, procesos_graficos, perfil_memoria)
\ No newline at end of file
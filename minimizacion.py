@@ -1,5 +1,5 @@
 # Minimización de AFD usando el algoritmo de partición de estados
-from typing import Set, Dict, List, Tuple, FrozenSet
+from typing import Set, Dict, List, Tuple, FrozenSet, Optional, Hashable
 from AFD import AFD
 
 def minimizar_afd(afd: AFD) -> AFD:
@@ -123,9 +123,85 @@ def construir_afd_minimizado(afd_original: AFD, particiones: List[Set[int]]) ->
                 afd_min.agregar_transicion(i, simbolo, destino_particion)
     
     afd_min.alfabeto = afd_original.alfabeto.copy()
+    afd_min.clases = afd_original.clases
     
     return afd_min
 
+def minimizar_afd_hopcroft(afd: AFD, etiquetas: Optional[Dict[int, Hashable]] = None) -> AFD:
+    if not afd.estados or afd.estado_inicial is None:
+        return afd
+
+    estados = sorted(obtener_estados_accesibles(afd))
+    alfabeto = sorted(afd.alfabeto)
+    indice = {q: i for i, q in enumerate(estados)}
+    n = len(estados)
+    # Estado sumidero virtual para las transiciones faltantes; empieza en su
+    # propio bloque para que nunca se mezcle con un estado real
+    sumidero = n
+
+    #Listas de transiciones inversas por símbolo
+    inversas: Dict[str, List[List[int]]] = {a: [[] for _ in range(n + 1)] for a in alfabeto}
+    for i, q in enumerate(estados):
+        trans = afd.transiciones.get(q, {})
+        for a in alfabeto:
+            destino = trans.get(a)
+            inversas[a][indice[destino] if destino is not None else sumidero].append(i)
+    for a in alfabeto:
+        inversas[a][sumidero].append(sumidero)
+
+    #Partición inicial: no finales, finales (separados por etiqueta si se
+    #indican, p. ej. los patrones que acepta cada estado) y el sumidero
+    grupos: Dict[Tuple, Set[int]] = {}
+    for i, q in enumerate(estados):
+        clase = (q in afd.estados_finales, etiquetas.get(q) if etiquetas is not None else None)
+        grupos.setdefault(clase, set()).add(i)
+    bloques: List[Set[int]] = list(grupos.values()) + [{sumidero}]
+    bloque_de: List[int] = [0] * (n + 1)
+    for b, miembros in enumerate(bloques):
+        for i in miembros:
+            bloque_de[i] = b
+
+    #Basta con encolar todos los bloques salvo el mayor
+    mayor = max(range(len(bloques)), key=lambda b: len(bloques[b]))
+    pendientes: List[Tuple[int, str]] = [(b, a) for b in range(len(bloques)) if b != mayor for a in alfabeto]
+    en_pendientes: Set[Tuple[int, str]] = set(pendientes)
+
+    while pendientes:
+        divisor = pendientes.pop()
+        en_pendientes.discard(divisor)
+        b, a = divisor
+
+        #Predecesores del bloque divisor agrupados por su bloque actual
+        tocados: Dict[int, List[int]] = {}
+        inv = inversas[a]
+        for q in bloques[b]:
+            for p in inv[q]:
+                tocados.setdefault(bloque_de[p], []).append(p)
+
+        for y, ps in tocados.items():
+            if len(ps) == len(bloques[y]):
+                continue
+            #Dividir y; el bloque nuevo es siempre la parte más pequeña
+            parte = set(ps)
+            resto = bloques[y] - parte
+            if len(parte) > len(resto):
+                parte, resto = resto, parte
+            bloques[y] = resto
+            nuevo = len(bloques)
+            bloques.append(parte)
+            for p in parte:
+                bloque_de[p] = nuevo
+            for c in alfabeto:
+                if (nuevo, c) not in en_pendientes:
+                    pendientes.append((nuevo, c))
+                    en_pendientes.add((nuevo, c))
+
+    #Bloques reales ordenados por su estado de menor id; el inicial queda primero
+    particiones = [{estados[i] for i in bloque} for bloque in bloques if sumidero not in bloque]
+    particiones.sort(key=lambda part: (afd.estado_inicial not in part, min(part)))
+
+    return construir_afd_minimizado(afd, particiones)
+
 def obtener_info_minimizacion(afd_original: AFD, afd_minimizado: AFD) -> str:
     estados_originales = len(afd_original.estados)
     estados_minimizados = len(afd_minimizado.estados)
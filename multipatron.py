@@ -0,0 +1,88 @@
+# AFD multipatrón: la unión de varias expresiones en un único autómata cuyos
+# estados finales llevan el conjunto de patrones que aceptan. Una sola pasada
+# sobre la cadena indica todas las expresiones que la aceptan.
+import sys
+from typing import Dict, FrozenSet, List
+from ShuntingYard import infix_to_postfix, expand_operators
+from simplificacion import simplificar_postfix
+from AFN import AFN, construir_fragmento
+from AFD import AFD, TablaAFD, convertir_afn_a_afd, compilar_afd, ESTADO_MUERTO
+from minimizacion import minimizar_afd_hopcroft
+
+SIN_PATRONES: FrozenSet[int] = frozenset()
+
+class AFDMultipatron:
+    def __init__(self, expresiones: List[str], afd: AFD, etiquetas: Dict[int, FrozenSet[int]]):
+        self.expresiones = expresiones
+        self.afd = afd
+        # Estado del AFD -> ids (posición en expresiones) de los patrones que acepta
+        self.etiquetas = etiquetas
+        self.tabla: TablaAFD = compilar_afd(afd)
+        self.etiquetas_por_fila: List[FrozenSet[int]] = [SIN_PATRONES] * self.tabla.num_estados
+        for q, fila in self.tabla.estado_a_fila.items():
+            self.etiquetas_por_fila[fila] = etiquetas.get(q, SIN_PATRONES)
+
+def construir_multipatron(expresiones: List[str]) -> AFDMultipatron:
+    # AFN combinado: un estado inicial con ε hacia el fragmento de cada patrón
+    afn = AFN()
+    inicio = afn.crear_estado()
+    afn.establecer_inicial(inicio)
+    patron_de_final: Dict[int, int] = {}
+    for i, expresion in enumerate(expresiones):
+        postfix = simplificar_postfix(infix_to_postfix(expand_operators(expresion)))
+        ini, fin = construir_fragmento(afn, postfix)
+        inicio.agregar_transicion('@', ini)
+        afn.establecer_final(fin)
+        patron_de_final[fin.id] = i
+
+    afd = convertir_afn_a_afd(afn)
+
+    # Cada estado del AFD hereda los patrones de los finales del AFN que contiene
+    etiquetas: Dict[int, FrozenSet[int]] = {}
+    for q in afd.estados_finales:
+        etiquetas[q] = frozenset(patron_de_final[e_id] for e_id in afd.estados[q] if e_id in patron_de_final)
+
+    # La minimización sólo puede unir estados que aceptan los mismos patrones
+    afd_min = minimizar_afd_hopcroft(afd, etiquetas)
+    etiquetas_min: Dict[int, FrozenSet[int]] = {}
+    for q in afd_min.estados_finales:
+        representante = next(iter(afd_min.estados[q]))
+        etiquetas_min[q] = etiquetas[representante]
+
+    return AFDMultipatron(list(expresiones), afd_min, etiquetas_min)
+
+def patrones_que_aceptan(multi: AFDMultipatron, cadena: str) -> FrozenSet[int]:
+    tabla = multi.tabla
+    t = tabla.tabla
+    clases = tabla.clases
+    q = tabla.inicial
+    if q == ESTADO_MUERTO:
+        return SIN_PATRONES
+    for c in cadena:
+        q = t[q + clases[c]]
+        if q == ESTADO_MUERTO:
+            return SIN_PATRONES
+    return multi.etiquetas_por_fila[q // tabla.num_clases]
+
+def expresiones_que_aceptan(multi: AFDMultipatron, cadena: str) -> List[str]:
+    return [multi.expresiones[i] for i in sorted(patrones_que_aceptan(multi, cadena))]
+
+if __name__ == "__main__":
+    # Uso: python multipatron.py expresiones.txt cadena [cadena ...]
+    from main import parse_linea
+    if len(sys.argv) < 3:
+        print("Uso: python multipatron.py <archivo de expresiones> <cadena> [cadena ...]")
+        sys.exit(1)
+
+    expresiones: List[str] = []
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        for linea in f:
+            expr, _ = parse_linea(linea)
+            if expr is not None and expr not in expresiones:
+                expresiones.append(expr)
+
+    multi = construir_multipatron(expresiones)
+    print(f"Patrones: {len(expresiones)}, estados del AFD combinado: {len(multi.afd.estados)}")
+    for cadena in sys.argv[2:]:
+        aceptan = expresiones_que_aceptan(multi, cadena)
+        print(f"{cadena!r}: {', '.join(aceptan) if aceptan else '(ninguna)'}")
@@ -0,0 +1,130 @@
+# Instrumentación por etapas de procesar_archivo (--perfil). Sin perfilador
+# activo, etapa() devuelve un contexto nulo compartido y contar() retorna de
+# inmediato, así que con el perfil apagado el costo es una llamada por etapa.
+# Con memoria=True, tracemalloc queda activo toda la corrida y encarece cada
+# asignación: los tiempos salen inflados (varias veces en la construcción de
+# autómatas) y el resumen lo advierte; --perfil-sin-memoria lo apaga.
+import json
+import time
+import tracemalloc
+from contextlib import nullcontext
+from typing import Dict, List, Optional, TextIO, Tuple
+
+_NULO = nullcontext()
+_activo: Optional["Perfilador"] = None
+
+class _Etapa:
+    __slots__ = ('perfilador', 'nombre', 'inicio')
+
+    def __init__(self, perfilador: "Perfilador", nombre: str):
+        self.perfilador = perfilador
+        self.nombre = nombre
+        self.inicio = 0.0
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.perfilador.registrar_tiempo(self.nombre, time.perf_counter() - self.inicio)
+        return False
+
+class Perfilador:
+    def __init__(self, salida: TextIO, memoria: bool = True):
+        # Un registro JSON por línea procesada (JSONL)
+        self.salida = salida
+        self.memoria = memoria
+        # Acumulados de la línea en curso
+        self.tiempos: Dict[str, float] = {}
+        self.contadores: Dict[str, int] = {}
+        # Agregados de toda la corrida por etapa
+        self.totales: Dict[str, float] = {}
+        self.llamadas: Dict[str, int] = {}
+        self.maximos: Dict[str, Tuple[float, int]] = {}
+        self.contadores_totales: Dict[str, int] = {}
+        self.lineas = 0
+
+    def iniciar(self):
+        if self.memoria:
+            tracemalloc.start()
+
+    def finalizar(self):
+        if self.memoria and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def etapa(self, nombre: str) -> _Etapa:
+        return _Etapa(self, nombre)
+
+    def registrar_tiempo(self, nombre: str, segundos: float):
+        self.tiempos[nombre] = self.tiempos.get(nombre, 0.0) + segundos
+
+    def contar(self, nombre: str, cantidad: int = 1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    def terminar_linea(self, num_linea: int, **datos):
+        """Emite el registro de la línea con todo lo acumulado desde el anterior"""
+        registro = {'linea': num_linea, 'tiempos': self.tiempos, 'contadores': self.contadores}
+        registro.update(datos)
+        if self.memoria:
+            registro['memoria_pico'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        self.salida.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+        for nombre, segundos in self.tiempos.items():
+            self.totales[nombre] = self.totales.get(nombre, 0.0) + segundos
+            self.llamadas[nombre] = self.llamadas.get(nombre, 0) + 1
+            if segundos > self.maximos.get(nombre, (-1.0, 0))[0]:
+                self.maximos[nombre] = (segundos, num_linea)
+        for nombre, cantidad in self.contadores.items():
+            self.contadores_totales[nombre] = self.contadores_totales.get(nombre, 0) + cantidad
+        self.lineas += 1
+        self.tiempos = {}
+        self.contadores = {}
+
+    def resumen(self) -> List[Dict]:
+        """Etapas ordenadas de mayor a menor tiempo total"""
+        total = sum(self.totales.values()) or 1.0
+        filas = []
+        for nombre, segundos in sorted(self.totales.items(), key=lambda x: -x[1]):
+            maximo, linea = self.maximos[nombre]
+            filas.append({'etapa': nombre, 'total': segundos, 'porcentaje': 100.0 * segundos / total,
+                          'lineas': self.llamadas[nombre], 'media': segundos / self.llamadas[nombre],
+                          'maximo': maximo, 'linea_maximo': linea})
+        return filas
+
+    def mostrar_resumen(self):
+        print(f"\n{'='*60}")
+        print("PERFIL POR ETAPAS")
+        print(f"{'='*60}")
+        print(f"{'etapa':<16} {'total':>10} {'%':>6} {'líneas':>7} {'media':>10} {'máximo':>10} {'en línea':>9}")
+        for f in self.resumen():
+            print(f"{f['etapa']:<16} {f['total']*1000:>8.2f}ms {f['porcentaje']:>5.1f}% {f['lineas']:>7} "
+                  f"{f['media']*1000:>8.3f}ms {f['maximo']*1000:>8.3f}ms {f['linea_maximo']:>9}")
+        if self.contadores_totales:
+            print("Contadores: " + ", ".join(f"{k}={v}" for k, v in sorted(self.contadores_totales.items())))
+        if self.memoria:
+            print("Advertencia: los tiempos incluyen el costo de tracemalloc (medición de memoria); "
+                  "use --perfil-sin-memoria para tiempos reales")
+
+def activar(perfilador: Perfilador):
+    global _activo
+    _activo = perfilador
+    perfilador.iniciar()
+
+def desactivar():
+    global _activo
+    if _activo is not None:
+        _activo.finalizar()
+    _activo = None
+
+def activo() -> Optional[Perfilador]:
+    return _activo
+
+def etapa(nombre: str):
+    if _activo is None:
+        return _NULO
+    return _activo.etapa(nombre)
+
+def contar(nombre: str, cantidad: int = 1):
+    if _activo is not None:
+        _activo.contar(nombre, cantidad)
@@ -0,0 +1,281 @@
+# Servidor de coincidencias: mantiene en memoria las tablas de los AFD ya
+# compilados y atiende pedidos en líneas JSON por TCP o socket Unix, sin pagar
+# en cada consulta el arranque del intérprete ni la construcción del autómata.
+#
+# Pedidos (uno por línea; "id" es opcional y se devuelve tal cual):
+#   {"id": 1, "op": "compilar", "expr": "(a|b)*abb"}
+#   {"id": 2, "op": "coincidir", "expr": "(a|b)*abb", "cadenas": ["abb", "ab"]}
+#   {"id": 3, "op": "estadisticas"}
+# Respuestas:
+#   {"id": 1, "ok": true, "estados": 4, "clases": 3}
+#   {"id": 2, "ok": true, "resultados": [true, false]}
+#   {"id": 4, "ok": false, "error": "..."}
+# También se aceptan "compile", "match" y "stats" como nombres de operación.
+# Las respuestas de una misma conexión pueden llegar en otro orden que los
+# pedidos; el "id" sirve para emparejarlas.
+import os
+import sys
+import json
+import signal
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from AFD import TablaAFD, simular_tabla
+from compilacion import CachePatrones, DIRECTORIO_CACHE
+from literales import Literales
+
+HOST_SERVIDOR = '127.0.0.1'
+PUERTO_SERVIDOR = 8765
+MAX_RESIDENTES = 1024
+# Largo máximo de una línea de pedido (un "coincidir" con muchas cadenas)
+LIMITE_LINEA = 16 * 1024 * 1024
+# Lotes de hasta esta carga (caracteres más RECARGO_CADENA por cadena, ~0.5 ms)
+# se resuelven en el propio lazo; los mayores van a un hilo para no frenar al
+# resto de las conexiones
+CARGA_EN_LAZO = 4096
+RECARGO_CADENA = 16
+
+class Residente:
+    """Lo que queda en memoria de un patrón: la tabla del AFD mínimo y el prefiltro"""
+    __slots__ = ('tabla', 'literales')
+
+    def __init__(self, tabla: TablaAFD, literales: Literales):
+        self.tabla = tabla
+        self.literales = None if literales.es_trivial() else literales
+
+    def coincidir(self, cadenas: List[str]) -> List[bool]:
+        tabla, literales = self.tabla, self.literales
+        if literales is None:
+            return [simular_tabla(tabla, c) for c in cadenas]
+        return [not literales.descarta(c) and simular_tabla(tabla, c) for c in cadenas]
+
+class ServidorPatrones:
+    def __init__(self, max_residentes: int = MAX_RESIDENTES, cache_disco: bool = False):
+        self.max_residentes = max_residentes
+        # Por texto de la expresión, para que la consulta no tenga que normalizarla
+        self.residentes: "OrderedDict[str, Residente]" = OrderedDict()
+        # La caché de patrones aporta la normalización y el disco; no es segura
+        # entre hilos, así que todas las compilaciones pasan por un único hilo
+        self.cache = CachePatrones(max_residentes, directorio=DIRECTORIO_CACHE if cache_disco else None)
+        self.ejecutor = ThreadPoolExecutor(max_workers=1)
+        # Los lotes grandes se simulan aparte para no quedar detrás de una compilación
+        self.ejecutor_coincidencias = ThreadPoolExecutor(max_workers=1)
+        # Compilaciones en curso y lotes de "coincidir" abiertos, por expresión
+        self.compilando: Dict[str, asyncio.Future] = {}
+        self.lotes: Dict[str, List[Tuple[List[str], asyncio.Future]]] = {}
+        self.pedidos = 0
+        self.lotes_procesados = 0
+        self.cadenas = 0
+
+    def _compilar(self, expresion: str) -> Residente:
+        patron = self.cache.obtener(expresion)
+        return Residente(patron.tabla, patron.literales)
+
+    async def residente(self, expresion: str) -> Residente:
+        residente = self.residentes.get(expresion)
+        if residente is not None:
+            self.residentes.move_to_end(expresion)
+            return residente
+
+        # Los pedidos simultáneos de una expresión nueva esperan la misma
+        # compilación. Todos la esperan con shield y el registro lo hace el
+        # callback, así cancelar a uno de ellos no cancela la de los demás
+        futuro = self.compilando.get(expresion)
+        if futuro is None:
+            futuro = asyncio.get_running_loop().run_in_executor(self.ejecutor, self._compilar, expresion)
+            self.compilando[expresion] = futuro
+            futuro.add_done_callback(lambda f: self._compilado(expresion, f))
+        return await asyncio.shield(futuro)
+
+    def _compilado(self, expresion: str, futuro: asyncio.Future):
+        del self.compilando[expresion]
+        if futuro.cancelled() or futuro.exception() is not None:
+            return
+        self.residentes[expresion] = futuro.result()
+        if len(self.residentes) > self.max_residentes:
+            self.residentes.popitem(last=False)
+
+    async def coincidir(self, expresion: str, cadenas: List[str]) -> List[bool]:
+        """Se suma al lote abierto de la expresión, o abre uno nuevo"""
+        futuro = asyncio.get_running_loop().create_future()
+        lote = self.lotes.get(expresion)
+        if lote is None:
+            lote = self.lotes[expresion] = []
+            asyncio.create_task(self._procesar_lote(expresion, lote))
+        lote.append((cadenas, futuro))
+        return await futuro
+
+    async def _procesar_lote(self, expresion: str, lote: List[Tuple[List[str], asyncio.Future]]):
+        try:
+            # Ceder una vuelta deja que se sumen los pedidos ya leídos de todas las
+            # conexiones; si hay que compilar, se suman también los que lleguen mientras
+            try:
+                await asyncio.sleep(0)
+                residente = await self.residente(expresion)
+            finally:
+                # El lote se cierra pase lo que pase; los pedidos siguientes abren otro
+                del self.lotes[expresion]
+        except Exception as e:
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+        except asyncio.CancelledError:
+            for _, futuro in lote:
+                futuro.cancel()
+            raise
+
+        self.lotes_procesados += 1
+        pendientes = [(cadenas, futuro) for cadenas, futuro in lote if not futuro.done()]
+        carga = sum(len(c) + RECARGO_CADENA for cadenas, _ in pendientes for c in cadenas)
+        try:
+            if carga <= CARGA_EN_LAZO:
+                resultados = [residente.coincidir(cadenas) for cadenas, _ in pendientes]
+            else:
+                resultados = await asyncio.get_running_loop().run_in_executor(
+                    self.ejecutor_coincidencias, lambda: [residente.coincidir(c) for c, _ in pendientes])
+        except asyncio.CancelledError:
+            for _, futuro in pendientes:
+                futuro.cancel()
+            raise
+        except Exception as e:
+            for _, futuro in pendientes:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+        for (cadenas, futuro), resultado in zip(pendientes, resultados):
+            if not futuro.done():
+                self.cadenas += len(cadenas)
+                futuro.set_result(resultado)
+
+    def estadisticas(self) -> Dict[str, int]:
+        stats_cache = self.cache.estadisticas()
+        return {
+            'residentes': len(self.residentes),
+            'pedidos': self.pedidos,
+            'lotes': self.lotes_procesados,
+            'cadenas': self.cadenas,
+            'compilaciones': stats_cache['fallos'],
+            'desde_disco': stats_cache['aciertos_disco'],
+        }
+
+    async def responder(self, pedido) -> Dict:
+        if not isinstance(pedido, dict):
+            raise ValueError("El pedido debe ser un objeto JSON.")
+        op = OPERACIONES.get(pedido.get('op'))
+        if op is None:
+            raise ValueError(f"Operación desconocida: {pedido.get('op')!r}")
+        if op == 'estadisticas':
+            return self.estadisticas()
+
+        expresion = pedido.get('expr')
+        if not isinstance(expresion, str) or not expresion:
+            raise ValueError("Falta 'expr' (texto no vacío).")
+        if op == 'compilar':
+            residente = await self.residente(expresion)
+            return {'estados': residente.tabla.num_estados - 1, 'clases': residente.tabla.num_clases}
+
+        cadenas = pedido.get('cadenas')
+        if not isinstance(cadenas, list) or not all(isinstance(c, str) for c in cadenas):
+            raise ValueError("Falta 'cadenas' (lista de textos).")
+        return {'resultados': await self.coincidir(expresion, cadenas)}
+
+    async def _atender_pedido(self, linea: bytes, escritor: asyncio.StreamWriter):
+        identificador = None
+        try:
+            pedido = json.loads(linea)
+            if isinstance(pedido, dict):
+                identificador = pedido.get('id')
+            respuesta = {'id': identificador, 'ok': True}
+            respuesta.update(await self.responder(pedido))
+        except Exception as e:
+            respuesta = {'id': identificador, 'ok': False, 'error': str(e)}
+        if not escritor.is_closing():
+            escritor.write(json.dumps(respuesta, ensure_ascii=False).encode('utf-8') + b'\n')
+
+    async def atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        """Una conexión: cada línea se atiende como tarea aparte para que los
+        pedidos encadenados sin esperar respuesta puedan compartir lote"""
+        tareas = set()
+        try:
+            while True:
+                try:
+                    linea = await lector.readline()
+                except ValueError:
+                    # Línea más larga que LIMITE_LINEA: no hay forma de resincronizar
+                    escritor.write(b'{"id": null, "ok": false, "error": "Pedido demasiado largo."}\n')
+                    break
+                if not linea:
+                    break
+                if not linea.strip():
+                    continue
+                self.pedidos += 1
+                tarea = asyncio.create_task(self._atender_pedido(linea, escritor))
+                tareas.add(tarea)
+                tarea.add_done_callback(tareas.discard)
+                await escritor.drain()
+            if tareas:
+                await asyncio.gather(*tareas)
+            await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+OPERACIONES = {
+    'compilar': 'compilar', 'compile': 'compilar',
+    'coincidir': 'coincidir', 'match': 'coincidir',
+    'estadisticas': 'estadisticas', 'stats': 'estadisticas',
+}
+
+async def servir(servidor: ServidorPatrones, host: str = HOST_SERVIDOR, puerto: int = PUERTO_SERVIDOR,
+                 ruta_unix: Optional[str] = None):
+    if ruta_unix is not None:
+        red = await asyncio.start_unix_server(servidor.atender, path=ruta_unix, limit=LIMITE_LINEA)
+        print(f"Servidor escuchando en {ruta_unix}")
+    else:
+        red = await asyncio.start_server(servidor.atender, host, puerto, limit=LIMITE_LINEA)
+        print(f"Servidor escuchando en {host}:{puerto}")
+    # SIGTERM termina igual que Ctrl+C (y se borra el socket Unix)
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except (NotImplementedError, AttributeError):
+        pass
+    async with red:
+        await red.serve_forever()
+
+if __name__ == "__main__":
+    host, puerto, ruta_unix = HOST_SERVIDOR, PUERTO_SERVIDOR, None
+    max_residentes = MAX_RESIDENTES
+    argumentos = sys.argv[1:]
+    try:
+        for i, arg in enumerate(argumentos):
+            valor = argumentos[i + 1] if i + 1 < len(argumentos) else None
+            if arg == "--tcp" and valor is not None:
+                # --tcp puerto o --tcp host:puerto
+                if ':' in valor:
+                    host, valor = valor.rsplit(':', 1)
+                puerto = int(valor)
+            elif arg == "--unix" and valor is not None:
+                ruta_unix = valor
+            elif arg == "--max-patrones" and valor is not None:
+                max_residentes = int(valor)
+    except ValueError:
+        print("Error: --tcp y --max-patrones requieren un número entero")
+        sys.exit(1)
+    if max_residentes < 1:
+        print("Error: --max-patrones debe ser al menos 1")
+        sys.exit(1)
+
+    servidor = ServidorPatrones(max_residentes, cache_disco="--cache-disco" in argumentos)
+    try:
+        asyncio.run(servir(servidor, host, puerto, ruta_unix))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("\nServidor detenido")
+        print(", ".join(f"{k}={v}" for k, v in servidor.estadisticas().items()))
+    finally:
+        servidor.ejecutor.shutdown(wait=False)
+        servidor.ejecutor_coincidencias.shutdown(wait=False)
+        if ruta_unix is not None and os.path.exists(ruta_unix):
+            os.remove(ruta_unix)
@@ -0,0 +1,164 @@
+# Árbol sintáctico de la expresión regular con simplificación algebraica.
+# Los nodos se construyen desde el postfix con constructores que aplican
+# reglas de reescritura correctas y comparten (hash-consing) los subárboles
+# idénticos, así que x|x o x·x* se detectan comparando identidad.
+from typing import Dict, FrozenSet, List, Tuple
+
+EPSILON = '@'
+
+class Nodo:
+    __slots__ = ('op', 'valor', 'hijos', 'id', 'anulable')
+
+    def __init__(self, op: str, valor: str, hijos: Tuple["Nodo", ...], id_nodo: int, anulable: bool):
+        # op: 'sim', 'eps', '·', '|', '*', '+', '?'
+        self.op = op
+        self.valor = valor
+        self.hijos = hijos
+        self.id = id_nodo
+        self.anulable = anulable
+
+class FabricaNodos:
+    def __init__(self):
+        self._tabla: Dict[Tuple, Nodo] = {}
+        # Conjunto de alternativas de cada nodo '|' para descartar repetidos
+        self._miembros_union: Dict[int, FrozenSet[Nodo]] = {}
+        self.epsilon = self._crear('eps', EPSILON, (), True)
+
+    def _crear(self, op: str, valor: str, hijos: Tuple[Nodo, ...], anulable: bool) -> Nodo:
+        clave = (op, valor, tuple(h.id for h in hijos))
+        nodo = self._tabla.get(clave)
+        if nodo is None:
+            nodo = Nodo(op, valor, hijos, len(self._tabla), anulable)
+            self._tabla[clave] = nodo
+        return nodo
+
+    def simbolo(self, token: str) -> Nodo:
+        if token == EPSILON:
+            return self.epsilon
+        return self._crear('sim', token, (), False)
+
+    def concatenacion(self, a: Nodo, b: Nodo) -> Nodo:
+        # ε·x = x·ε = x
+        if a is self.epsilon:
+            return b
+        if b is self.epsilon:
+            return a
+        # x·x* = x*·x = x+
+        if b.op == '*' and b.hijos[0] is a:
+            return self.positivo(a)
+        if a.op == '*' and a.hijos[0] is b:
+            return self.positivo(b)
+        # x*·x* = x*
+        if a is b and a.op == '*':
+            return a
+        return self._crear('·', '', (a, b), a.anulable and b.anulable)
+
+    def union(self, a: Nodo, b: Nodo) -> Nodo:
+        # x|ε = ε|x = x?
+        if a is self.epsilon:
+            return self.opcional(b)
+        if b is self.epsilon:
+            return self.opcional(a)
+        # Se aplana la alternativa y se descartan repetidos (x|x = x)
+        vistos = self._miembros(a)
+        nuevas = tuple(m for m in (b.hijos if b.op == '|' else (b,)) if m not in vistos)
+        if not nuevas:
+            return a
+        alternativas = (a.hijos if a.op == '|' else (a,)) + nuevas
+        nodo = self._crear('|', '', alternativas, any(m.anulable for m in alternativas))
+        if nodo.id not in self._miembros_union:
+            self._miembros_union[nodo.id] = vistos.union(nuevas)
+        return nodo
+
+    def _miembros(self, nodo: Nodo) -> FrozenSet[Nodo]:
+        if nodo.op == '|':
+            return self._miembros_union[nodo.id]
+        return frozenset((nodo,))
+
+    def kleene(self, a: Nodo) -> Nodo:
+        # ε* = ε, (x*)* = x*, (x+)* = (x?)* = x*
+        if a is self.epsilon:
+            return a
+        if a.op == '*':
+            return a
+        if a.op in ('+', '?'):
+            return self.kleene(a.hijos[0])
+        # (x*|y)* = (x|y)*
+        if a.op == '|' and any(m.op in ('*', '+', '?') for m in a.hijos):
+            internas = [m.hijos[0] if m.op in ('*', '+', '?') else m for m in a.hijos]
+            base = internas[0]
+            for m in internas[1:]:
+                base = self.union(base, m)
+            return self.kleene(base)
+        return self._crear('*', '', (a,), True)
+
+    def positivo(self, a: Nodo) -> Nodo:
+        # ε+ = ε, (x+)+ = x+, y si x acepta ε entonces x+ = x*
+        if a is self.epsilon:
+            return a
+        if a.op == '+':
+            return a
+        if a.anulable:
+            return self.kleene(a)
+        return self._crear('+', '', (a,), False)
+
+    def opcional(self, a: Nodo) -> Nodo:
+        # Si x acepta ε entonces x? = x; además (x+)? = x*
+        if a.anulable:
+            return a
+        if a.op == '+':
+            return self.kleene(a.hijos[0])
+        return self._crear('?', '', (a,), True)
+
+def construir_arbol(postfix: List[str], fabrica: FabricaNodos = None) -> Nodo:
+    if fabrica is None:
+        fabrica = FabricaNodos()
+    pila: List[Nodo] = []
+    for tok in postfix:
+        if tok in ('·', '|'):
+            if len(pila) < 2:
+                raise ValueError(f"Postfix inválido: faltan operandos para '{tok}'.")
+            b = pila.pop()
+            a = pila.pop()
+            pila.append(fabrica.concatenacion(a, b) if tok == '·' else fabrica.union(a, b))
+        elif tok in ('*', '+', '?'):
+            if not pila:
+                raise ValueError(f"Postfix inválido: falta operando para '{tok}'.")
+            a = pila.pop()
+            if tok == '*':
+                pila.append(fabrica.kleene(a))
+            elif tok == '+':
+                pila.append(fabrica.positivo(a))
+            else:
+                pila.append(fabrica.opcional(a))
+        else:
+            pila.append(fabrica.simbolo(tok))
+    if len(pila) != 1:
+        raise ValueError("Expresión mal formada (postfix): pila no quedó con 1 elemento.")
+    return pila[0]
+
+def arbol_a_postfix(raiz: Nodo) -> List[str]:
+    # Recorrido en postorden iterativo para no depender del límite de recursión;
+    # la pila guarda nodos pendientes y operadores ya listos para emitir
+    salida: List[str] = []
+    pila: List = [raiz]
+    while pila:
+        item = pila.pop()
+        if isinstance(item, str):
+            salida.append(item)
+        elif item.op in ('sim', 'eps'):
+            salida.append(item.valor)
+        elif item.op == '|':
+            # Unión asociada a la izquierda: a b | c | ...
+            pendientes = [item.hijos[0]]
+            for m in item.hijos[1:]:
+                pendientes.append(m)
+                pendientes.append('|')
+            pila.extend(reversed(pendientes))
+        else:
+            pila.append(item.op)
+            pila.extend(reversed(item.hijos))
+    return salida
+
+def simplificar_postfix(postfix: List[str]) -> List[str]:
+    return arbol_a_postfix(construir_arbol(postfix))
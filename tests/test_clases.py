@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from AFN import construir_afn_desde_expresion, simular_afn
+
+
+def test_clase_con_solo_arroba_es_literal():
+    # '@' es ε en el postfix: [@] debe seguir siendo el carácter, no la cadena vacía
+    afn = construir_afn_desde_expresion('[@]')
+    assert simular_afn(afn, '@')
+    assert not simular_afn(afn, '')
+
+
+def test_clase_con_arroba_y_otros():
+    afn = construir_afn_desde_expresion('[@a]')
+    assert simular_afn(afn, '@')
+    assert simular_afn(afn, 'a')
+    assert not simular_afn(afn, '')
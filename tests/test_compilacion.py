@@ -0,0 +1,17 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from compilacion import CachePatrones
+
+
+def test_expresiones_equivalentes_comparten_automatas_no_postfix(tmp_path):
+    for directorio in (None, str(tmp_path), str(tmp_path)):
+        cache = CachePatrones(directorio=directorio)
+        largo = cache.obtener('a|a')
+        corto = cache.obtener('a')
+        assert largo.afn is corto.afn
+        assert corto.expresion == 'a'
+        assert corto.postfix == ['a']
+        assert largo.postfix == ['a', 'a', '|']
@@ -0,0 +1,135 @@
+# Tokenizador de coincidencia más larga (maximal munch) sobre el AFD multipatrón.
+# La entrada se consume por fragmentos; sólo se conserva el texto desde el
+# inicio del token en curso, así que un token puede cruzar fragmentos sin
+# volver a leer el archivo.
+import sys
+import codecs
+from typing import Dict, Iterable, Iterator, List, Tuple
+from AFD import ESTADO_MUERTO
+from multipatron import AFDMultipatron, construir_multipatron
+
+TAMANO_FRAGMENTO = 1 << 16
+
+class Tokenizador:
+    def __init__(self, especificacion: List[Tuple[str, str]]):
+        if not especificacion:
+            raise ValueError("La especificación de tokens está vacía.")
+        self.nombres = [nombre for nombre, _ in especificacion]
+        self.multi: AFDMultipatron = construir_multipatron([expr for _, expr in especificacion])
+        # Desplazamiento de fila -> token aceptado; ante empate gana el primero de la lista
+        k = self.multi.tabla.num_clases
+        self.token_de: Dict[int, int] = {}
+        for fila, patrones in enumerate(self.multi.etiquetas_por_fila):
+            if patrones:
+                self.token_de[fila * k] = min(patrones)
+
+def tokenizar(tokenizador: Tokenizador, fragmentos: Iterable[str]) -> Iterator[Tuple[str, str, int]]:
+    """Genera (tipo de token, lexema, desplazamiento en caracteres)"""
+    tabla = tokenizador.multi.tabla
+    t = tabla.tabla
+    clases = tabla.clases
+    inicial = tabla.inicial
+    token_de = tokenizador.token_de
+    nombres = tokenizador.nombres
+
+    fragmentos = iter(fragmentos)
+    buffer = ''
+    base = 0          # desplazamiento de buffer[0] en la entrada completa
+    inicio = 0        # inicio del token en curso dentro de buffer
+    pos = 0
+    q = inicial
+    ultimo_fin = -1   # fin de la coincidencia más larga vista desde inicio
+    ultimo_token = -1
+    agotado = False
+
+    while True:
+        n = len(buffer)
+        while pos < n:
+            q = t[q + clases[buffer[pos]]]
+            if q == ESTADO_MUERTO:
+                break
+            pos += 1
+            token = token_de.get(q)
+            if token is not None:
+                ultimo_fin = pos
+                ultimo_token = token
+
+        if pos == n:
+            if not agotado:
+                fragmento = next(fragmentos, None)
+                if fragmento is None:
+                    agotado = True
+                else:
+                    # Se descarta lo ya emitido y se conserva el token en curso
+                    buffer = buffer[inicio:] + fragmento
+                    base += inicio
+                    pos -= inicio
+                    if ultimo_fin >= 0:
+                        ultimo_fin -= inicio
+                    inicio = 0
+                continue
+            if inicio == n:
+                return
+
+        # Estado muerto o fin de la entrada: se emite la coincidencia más larga
+        if ultimo_fin < 0:
+            raise ValueError(f"Ningún token reconoce la entrada en la posición {base + inicio}: "
+                             f"{buffer[inicio:inicio + 20]!r}")
+        yield nombres[ultimo_token], buffer[inicio:ultimo_fin], base + inicio
+        inicio = pos = ultimo_fin
+        q = inicial
+        ultimo_fin = -1
+
+def fragmentos_archivo(nombre_archivo: str, tamano: int = TAMANO_FRAGMENTO) -> Iterator[str]:
+    with open(nombre_archivo, 'r', encoding='utf-8') as f:
+        while True:
+            fragmento = f.read(tamano)
+            if not fragmento:
+                return
+            yield fragmento
+
+def fragmentos_mmap(mapa, tamano: int = TAMANO_FRAGMENTO) -> Iterator[str]:
+    # El decodificador incremental evita cortar un carácter UTF-8 entre fragmentos
+    decodificador = codecs.getincrementaldecoder('utf-8')()
+    for i in range(0, len(mapa), tamano):
+        texto = decodificador.decode(mapa[i:i + tamano])
+        if texto:
+            yield texto
+    resto = decodificador.decode(b'', final=True)
+    if resto:
+        yield resto
+
+def tokenizar_archivo(tokenizador: Tokenizador, nombre_archivo: str,
+                      tamano: int = TAMANO_FRAGMENTO) -> Iterator[Tuple[str, str, int]]:
+    return tokenizar(tokenizador, fragmentos_archivo(nombre_archivo, tamano))
+
+def tokenizar_mmap(tokenizador: Tokenizador, mapa,
+                   tamano: int = TAMANO_FRAGMENTO) -> Iterator[Tuple[str, str, int]]:
+    return tokenizar(tokenizador, fragmentos_mmap(mapa, tamano))
+
+def leer_especificacion(nombre_archivo: str) -> List[Tuple[str, str]]:
+    """Cada línea: NOMBRE expresión. Las líneas vacías y las que empiezan con # se ignoran"""
+    especificacion = []
+    with open(nombre_archivo, 'r', encoding='utf-8') as f:
+        for linea in f:
+            raw = linea.strip()
+            if not raw or raw.startswith('#'):
+                continue
+            partes = raw.split(None, 1)
+            if len(partes) != 2:
+                raise ValueError(f"Línea de especificación inválida: {raw!r}")
+            especificacion.append((partes[0], partes[1]))
+    return especificacion
+
+if __name__ == "__main__":
+    # Uso: python tokenizador.py especificacion.txt entrada.txt
+    if len(sys.argv) < 3:
+        print("Uso: python tokenizador.py <especificación de tokens> <archivo de entrada>")
+        sys.exit(1)
+    tokenizador = Tokenizador(leer_especificacion(sys.argv[1]))
+    try:
+        for tipo, lexema, desplazamiento in tokenizar_archivo(tokenizador, sys.argv[2]):
+            print(f"{desplazamiento}\t{tipo}\t{lexema!r}")
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
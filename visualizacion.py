@@ -1,14 +1,19 @@
 # Visualización de autómatas generando imágenes 
 import os
 import math
+import shutil
+from collections import deque
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, Future
 from typing import Dict, Set, List, Tuple, Optional
 from AFN import AFN
 from AFD import AFD
 
 try:
-    import matplotlib.pyplot as plt
-    import matplotlib.patches as patches
-    from matplotlib.patches import FancyBboxPatch, Circle
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.patches import Circle
+    from matplotlib.collections import LineCollection, PatchCollection, PolyCollection
     import numpy as np
     MATPLOTLIB_DISPONIBLE = True
 except ImportError:
@@ -16,6 +21,53 @@ except ImportError:
     print("Advertencia: matplotlib no está instalado.")
     print("Instala con: pip install matplotlib")
 
+# Salida de las imágenes; se cambian con configurar_graficos (--dpi, --formato).
+# Con --dpi 150 cada PNG tiene la cuarta parte de píxeles y sale 2-3 veces más rápido
+DPI_GRAFICOS = 300
+FORMATO_GRAFICOS = 'png'
+FORMATOS_GRAFICOS = ('png', 'svg', 'pdf', 'jpg')
+# Puntos por curva de arista; a la resolución de salida 24 ya se ven suaves
+PUNTOS_CURVA = 24
+RADIO_ESTADO = 0.35
+RADIO_LAZO = 0.4
+# Disposición por capas, en unidades de datos
+SEPARACION_CAPAS = 2.5
+SEPARACION_EN_CAPA = 2.0
+BARRIDOS_BARICENTRO = 4
+# El lienzo crece con el grafo a razón de PULGADAS_POR_UNIDAD, hasta MAX_PULGADAS por lado
+PULGADAS_POR_UNIDAD = 0.6
+PULGADAS_POR_UNIDAD_RESUMEN = 0.25
+MAX_PULGADAS = 30
+# Caracteres máximos de la etiqueta de un estado del AFD ({ids originales})
+MAX_ETIQUETA_ESTADO = 10
+# Por encima de este número de estados se colapsan las cadenas ε y, si no
+# alcanza, se dibuja un resumen sin etiquetas (--limite-detalle)
+LIMITE_DETALLE = 60
+
+DIRECTORIO_GRAFICOS = 'graficos'
+# Almacén de imágenes por huella de contenido (ver ColaGraficos)
+DIRECTORIO_CONTENIDO = os.path.join(DIRECTORIO_GRAFICOS, '.contenido')
+# Subir al cambiar cómo se dibuja: invalida las imágenes ya guardadas
+VERSION_DIBUJO = 2
+PROCESOS_GRAFICOS = min(4, os.cpu_count() or 1)
+
+def configurar_graficos(dpi: Optional[int] = None, formato: Optional[str] = None,
+                        limite_detalle: Optional[int] = None):
+    global DPI_GRAFICOS, FORMATO_GRAFICOS, LIMITE_DETALLE
+    if dpi is not None:
+        if dpi < 1:
+            raise ValueError("Los DPI deben ser un entero positivo.")
+        DPI_GRAFICOS = dpi
+    if formato is not None:
+        formato = formato.lower().lstrip('.')
+        if formato not in FORMATOS_GRAFICOS:
+            raise ValueError(f"Formato no soportado: {formato} (use {', '.join(FORMATOS_GRAFICOS)})")
+        FORMATO_GRAFICOS = formato
+    if limite_detalle is not None:
+        if limite_detalle < 1:
+            raise ValueError("El límite de detalle debe ser un entero positivo.")
+        LIMITE_DETALLE = limite_detalle
+
 def calcular_posiciones_estados(num_estados: int, radio_circulo: float = 3.0) -> Dict[int, Tuple[float, float]]:
     """Calcula posiciones en círculo para los estados"""
     if num_estados == 1:
@@ -30,378 +82,464 @@ def calcular_posiciones_estados(num_estados: int, radio_circulo: float = 3.0) ->
     
     return posiciones
 
-def calcular_posiciones_mejoradas(estados: List[int]) -> Dict[int, Tuple[float, float]]:
-    """Calcula posiciones optimizadas para minimizar cruces de aristas"""
-    n = len(estados)
-    if n == 0:
-        return {}
-    if n == 1:
-        return {estados[0]: (0, 0)}
-    
+def calcular_posiciones_capas(estados: List[int], aristas, inicial: Optional[int] = None,
+                              barridos: int = BARRIDOS_BARICENTRO) -> Dict[int, Tuple[float, float]]:
+    """Disposición por capas de izquierda a derecha: la capa de un estado es su
+    distancia BFS desde el inicial, y el orden dentro de cada capa se ajusta con
+    barridos de baricentro para reducir cruces. Cada barrido es O(V+E) más el
+    ordenamiento de las capas."""
+    sucesores: Dict[int, List[int]] = {e: [] for e in estados}
+    predecesores: Dict[int, List[int]] = {e: [] for e in estados}
+    for origen, destino in aristas:
+        if origen != destino:
+            sucesores[origen].append(destino)
+            predecesores[destino].append(origen)
+
+    # Capas por BFS; lo que no se alcanza desde el inicial va en capas posteriores
+    capa: Dict[int, int] = {}
+    capas: List[List[int]] = []
+    raices = ([inicial] if inicial in sucesores else []) + list(estados)
+    for raiz in raices:
+        if raiz in capa:
+            continue
+        capa[raiz] = len(capas)
+        cola = deque((raiz,))
+        while cola:
+            e = cola.popleft()
+            nivel = capa[e]
+            if nivel == len(capas):
+                capas.append([])
+            capas[nivel].append(e)
+            for s in sucesores[e]:
+                if s not in capa:
+                    capa[s] = nivel + 1
+                    cola.append(s)
+
+    # Barridos alternados: hacia la derecha ordena cada capa por el promedio de
+    # la posición de sus predecesores en la capa anterior; hacia la izquierda,
+    # por sus sucesores en la siguiente. Sin vecinos ahí, conserva su lugar.
+    posicion = {e: i for c in capas for i, e in enumerate(c)}
+    for barrido in range(barridos):
+        if barrido % 2 == 0:
+            recorrido, vecinos, paso = range(1, len(capas)), predecesores, -1
+        else:
+            recorrido, vecinos, paso = range(len(capas) - 2, -1, -1), sucesores, 1
+        for i in recorrido:
+            fija = i + paso
+            baricentros = {}
+            for e in capas[i]:
+                suma, cantidad = 0, 0
+                for v in vecinos[e]:
+                    if capa[v] == fija:
+                        suma += posicion[v]
+                        cantidad += 1
+                baricentros[e] = suma / cantidad if cantidad else posicion[e]
+            capas[i].sort(key=baricentros.__getitem__)
+            for j, e in enumerate(capas[i]):
+                posicion[e] = j
+
     posiciones = {}
-    
-    if n <= 6:
-        # Disposición circular para pocos estados
-        for i, estado in enumerate(estados):
-            angulo = 2 * math.pi * i / n - math.pi / 2  # Comenzar desde arriba
-            radio = 2.5 if n <= 3 else 3.0
-            x = radio * math.cos(angulo)
-            y = radio * math.sin(angulo)
-            posiciones[estado] = (x, y)
-    else:
-        # Para muchos estados, usar disposición en capas
-        capas = int(math.ceil(math.sqrt(n)))
-        estados_por_capa = math.ceil(n / capas)
-        
-        for i, estado in enumerate(estados):
-            capa = i // estados_por_capa
-            pos_en_capa = i % estados_por_capa
-            total_en_capa = min(estados_por_capa, n - capa * estados_por_capa)
-            
-            radio = 1.5 + capa * 1.5
-            angulo = 2 * math.pi * pos_en_capa / total_en_capa - math.pi / 2
-            
-            x = radio * math.cos(angulo)
-            y = radio * math.sin(angulo)
-            posiciones[estado] = (x, y)
-    
+    for i, c in enumerate(capas):
+        centro = (len(c) - 1) / 2
+        for j, e in enumerate(c):
+            posiciones[e] = (i * SEPARACION_CAPAS, (centro - j) * SEPARACION_EN_CAPA)
     return posiciones
 
-def dibujar_flecha_curva(ax, start: Tuple[float, float], end: Tuple[float, float], 
-                        label: str, curvatura: float = 0.3, color: str = 'black'):
-    """Dibuja una flecha curva entre dos puntos"""
-    x1, y1 = start
-    x2, y2 = end
-    
-    # Calcular punto medio y punto de control para la curva
-    mid_x, mid_y = (x1 + x2) / 2, (y1 + y2) / 2
-    
-    # Vector perpendicular para la curvatura
-    dx, dy = x2 - x1, y2 - y1
-    length = math.sqrt(dx*dx + dy*dy)
-    if length == 0:
-        return  # Evitar división por cero
-    
-    # Normalizar y rotar 90 grados
-    perp_x, perp_y = -dy / length, dx / length
-    
-    # Punto de control para la curva Bézier
-    ctrl_x = mid_x + curvatura * perp_x
-    ctrl_y = mid_y + curvatura * perp_y
-    
-    # Crear la curva Bézier
-    t = np.linspace(0, 1, 100)
-    curve_x = (1-t)**2 * x1 + 2*(1-t)*t * ctrl_x + t**2 * x2
-    curve_y = (1-t)**2 * y1 + 2*(1-t)*t * ctrl_y + t**2 * y2
-    
-    # Dibujar la curva
-    ax.plot(curve_x, curve_y, color=color, linewidth=1.5)
-    
-    # Añadir punta de flecha
-    # Calcular dirección en el extremo
-    end_t = 0.95
-    arrow_x = (1-end_t)**2 * x1 + 2*(1-end_t)*end_t * ctrl_x + end_t**2 * x2
-    arrow_y = (1-end_t)**2 * y1 + 2*(1-end_t)*end_t * ctrl_y + end_t**2 * y2
-    
-    # Dirección de la flecha
-    dir_x = x2 - arrow_x
-    dir_y = y2 - arrow_y
-    dir_length = math.sqrt(dir_x*dir_x + dir_y*dir_y)
-    if dir_length > 0:
-        dir_x /= dir_length
-        dir_y /= dir_length
-        
-        # Dibujar punta de flecha
-        arrow_size = 0.15
-        ax.annotate('', xy=(x2, y2), xytext=(x2 - arrow_size*dir_x, y2 - arrow_size*dir_y),
-                   arrowprops=dict(arrowstyle='->', color=color, lw=1.5))
-    
-    # Añadir etiqueta en el punto medio de la curva
-    label_x = (1-0.5)**2 * x1 + 2*(1-0.5)*0.5 * ctrl_x + 0.5**2 * x2
-    label_y = (1-0.5)**2 * y1 + 2*(1-0.5)*0.5 * ctrl_y + 0.5**2 * y2
-    
-    # Fondo blanco para la etiqueta
-    ax.text(label_x, label_y, label, ha='center', va='center', 
-           bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor='none', alpha=0.8),
-           fontsize=10, weight='bold')
-
-def dibujar_auto_loop(ax, pos: Tuple[float, float], label: str, color: str = 'black'):
-    """Dibuja un auto-loop (transición de un estado a sí mismo)"""
-    x, y = pos
-    
-    # Crear un círculo pequeño arriba del estado
-    loop_radius = 0.4
-    loop_center_x = x
-    loop_center_y = y + 0.8
-    
-    # Dibujar el círculo del loop
-    circle = Circle((loop_center_x, loop_center_y), loop_radius, 
-                   fill=False, color=color, linewidth=1.5)
-    ax.add_patch(circle)
-    
-    # Añadir flecha
-    arrow_x = loop_center_x + loop_radius * 0.7
-    arrow_y = loop_center_y
-    ax.annotate('', xy=(arrow_x, arrow_y), 
-               xytext=(arrow_x - 0.1, arrow_y),
-               arrowprops=dict(arrowstyle='->', color=color, lw=1.5))
-    
-    # Etiqueta
-    ax.text(loop_center_x, loop_center_y + loop_radius + 0.3, label, 
-           ha='center', va='center', 
-           bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor='none', alpha=0.8),
-           fontsize=10, weight='bold')
-
-def generar_imagen_afn(afn: AFN, nombre_archivo: str, titulo: str = "AFN"):
-    """Genera imagen PNG del AFN"""
+def colapsar_cadenas_epsilon(etiquetas: Dict[int, str], finales: Set[int], inicial: Optional[int],
+                             aristas: Dict[Tuple[int, int], str]) -> int:
+    """Quita los estados de paso (una entrada, una salida, alguna de las dos ε) uniendo
+    sus aristas; ε·x = x, así que el lenguaje dibujado no cambia. Modifica los
+    diccionarios y devuelve cuántos estados quitó."""
+    entradas: Dict[int, Set[int]] = {e: set() for e in etiquetas}
+    salidas: Dict[int, Set[int]] = {e: set() for e in etiquetas}
+    for origen, destino in aristas:
+        salidas[origen].add(destino)
+        entradas[destino].add(origen)
+
+    quitados = 0
+    for e in list(etiquetas):
+        if e == inicial or e in finales or len(entradas[e]) != 1 or len(salidas[e]) != 1:
+            continue
+        p, = entradas[e]
+        s, = salidas[e]
+        # Lazos, o una arista p→s ya existente que habría que fusionar
+        if p == e or s == e or p == s or (p, s) in aristas:
+            continue
+        entrante, saliente = aristas[(p, e)], aristas[(e, s)]
+        if entrante != 'ε' and saliente != 'ε':
+            continue
+        del aristas[(p, e)], aristas[(e, s)], etiquetas[e]
+        aristas[(p, s)] = saliente if entrante == 'ε' else entrante
+        salidas[p].discard(e)
+        salidas[p].add(s)
+        entradas[s].discard(e)
+        entradas[s].add(p)
+        quitados += 1
+    return quitados
+
+def _completar_dibujo(dibujo: dict, limite_detalle: Optional[int]) -> dict:
+    """Aplica el nivel de detalle y calcula las posiciones del dibujo"""
+    limite = limite_detalle if limite_detalle is not None else LIMITE_DETALLE
+    etiquetas, aristas = dibujo['etiquetas_estados'], dibujo['aristas']
+    total = len(etiquetas)
+    dibujo['resumen'] = False
+    if total > limite:
+        quitados = colapsar_cadenas_epsilon(etiquetas, dibujo['finales'], dibujo['inicial'], aristas)
+        if len(etiquetas) > limite:
+            # Sigue siendo grande: sin textos, que son lo que más cuesta dibujar
+            dibujo['resumen'] = True
+            dibujo['titulo'] += f" [resumen: {total} estados, {len(aristas)} aristas]"
+        elif quitados:
+            dibujo['titulo'] += f" [{quitados} de {total} estados ε colapsados]"
+    dibujo['posiciones'] = calcular_posiciones_capas(list(etiquetas), aristas, dibujo['inicial'])
+    return dibujo
+
+# Dibujo por lotes: todas las curvas, puntas de flecha y estados de una imagen
+# se calculan con NumPy en una sola pasada y se agregan al eje como unas pocas
+# colecciones, en lugar de un objeto de matplotlib por arista.
+def curvas_bezier(origenes: "np.ndarray", destinos: "np.ndarray", curvatura: float = 0.3,
+                  puntos: int = PUNTOS_CURVA):
+    """Curvas cuadráticas de m aristas a la vez. Devuelve los puntos (m, puntos, 2),
+    el punto medio de cada curva (m, 2) y la tangente en el extremo final (m, 2)"""
+    d = destinos - origenes
+    largo = np.hypot(d[:, 0], d[:, 1])[:, None]
+    perpendicular = np.stack((-d[:, 1], d[:, 0]), axis=1) / largo
+    control = (origenes + destinos) / 2 + curvatura * perpendicular
+
+    t = np.linspace(0.0, 1.0, puntos)[None, :, None]
+    curvas = ((1 - t) ** 2 * origenes[:, None, :] + 2 * (1 - t) * t * control[:, None, :]
+              + t ** 2 * destinos[:, None, :])
+    medios = 0.25 * origenes + 0.5 * control + 0.25 * destinos
+    # La derivada en t = 1 es proporcional a destino - control
+    return curvas, medios, destinos - control
+
+def puntas_flecha(puntas: "np.ndarray", direcciones: "np.ndarray",
+                  largo: float = 0.15, ancho: float = 0.06) -> "np.ndarray":
+    """Triángulos (m, 3, 2) con el vértice en cada punta, orientados según la dirección"""
+    u = direcciones / np.hypot(direcciones[:, 0], direcciones[:, 1])[:, None]
+    perpendicular = np.stack((-u[:, 1], u[:, 0]), axis=1)
+    base = puntas - largo * u
+    return np.stack((puntas, base + ancho * perpendicular, base - ancho * perpendicular), axis=1)
+
+def _dibujar_estados(ax, xy: "np.ndarray", es_final: "np.ndarray", etiquetas: Optional[List[str]],
+                     color_normal: str, color_final: str):
+    circulos = [Circle((x, y), 0.4 if f else RADIO_ESTADO) for (x, y), f in zip(xy, es_final)]
+    colores = [color_final if f else color_normal for f in es_final]
+    ax.add_collection(PatchCollection(circulos, facecolors=colores, edgecolors='black',
+                                      linewidths=2, zorder=2))
+    # Segundo círculo de los estados finales
+    anillos = [Circle((x, y), 0.3) for x, y in xy[es_final]]
+    if anillos:
+        ax.add_collection(PatchCollection(anillos, facecolors='none', edgecolors='black',
+                                          linewidths=2, zorder=3))
+    for (x, y), etiqueta in zip(xy, etiquetas or ()):
+        ax.text(x, y, etiqueta, ha='center', va='center',
+                fontsize=10 if len(etiqueta) > 3 else 12, weight='bold', zorder=4)
+
+def _dibujar_aristas(ax, posiciones: Dict[int, Tuple[float, float]], aristas: Dict[Tuple[int, int], str],
+                     color: str = 'black', con_etiquetas: bool = True):
+    estilo_etiqueta = dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor='none', alpha=0.8)
+    normales = [(o, d) for o, d in aristas if o != d and posiciones[o] != posiciones[d]]
+    lazos = [o for o, d in aristas if o == d]
+    puntas = []
+    etiquetas: List[Tuple[float, float, str]] = []
+
+    if normales:
+        origenes = np.array([posiciones[o] for o, _ in normales], dtype=float)
+        destinos = np.array([posiciones[d] for _, d in normales], dtype=float)
+        # Recortar cada arista al borde de los círculos de sus estados
+        direccion = destinos - origenes
+        direccion /= np.hypot(direccion[:, 0], direccion[:, 1])[:, None]
+        curvas, medios, tangentes = curvas_bezier(origenes + RADIO_ESTADO * direccion,
+                                                  destinos - RADIO_ESTADO * direccion)
+        ax.add_collection(LineCollection(curvas, colors=color, linewidths=1.5, zorder=1))
+        puntas.append(puntas_flecha(curvas[:, -1, :], tangentes))
+        etiquetas.extend((x, y, aristas[a]) for (x, y), a in zip(medios, normales))
+
+    if lazos:
+        # Lazo: círculo sobre el estado, con la punta en su extremo derecho
+        centros = np.array([posiciones[e] for e in lazos], dtype=float) + (0.0, 0.8)
+        ax.add_collection(PatchCollection([Circle((x, y), RADIO_LAZO) for x, y in centros],
+                                          facecolors='none', edgecolors=color, linewidths=1.5, zorder=1))
+        extremos = centros + (RADIO_LAZO, 0.0)
+        puntas.append(puntas_flecha(extremos, np.tile((0.0, -1.0), (len(lazos), 1))))
+        etiquetas.extend((x, y + RADIO_LAZO + 0.3, aristas[(e, e)]) for (x, y), e in zip(centros, lazos))
+
+    if puntas:
+        ax.add_collection(PolyCollection(np.concatenate(puntas), facecolors=color, edgecolors=color,
+                                         linewidths=0.5, zorder=1))
+    for x, y, texto in (etiquetas if con_etiquetas else ()):
+        ax.text(x, y, texto, ha='center', va='center', bbox=estilo_etiqueta,
+                fontsize=10, weight='bold', zorder=4)
+
+def _guardar_grafo(nombre_archivo: str, titulo: str, posiciones: Dict[int, Tuple[float, float]],
+                   etiquetas_estados: Dict[int, str], finales: Set[int], inicial: Optional[int],
+                   aristas: Dict[Tuple[int, int], str], color_normal: str, color_final: str,
+                   resumen: bool = False, dpi: Optional[int] = None):
+    ids = list(posiciones)
+    xy = np.array([posiciones[e] for e in ids], dtype=float).reshape(-1, 2)
+
+    # Límites a la medida del grafo: a la izquierda la flecha de inicio, arriba los lazos
+    x_min, y_min = xy.min(axis=0) - (2.0, 1.0) if len(xy) else (-1.0, -1.0)
+    x_max, y_max = xy.max(axis=0) + (1.0, 1.8) if len(xy) else (1.0, 1.0)
+    ancho, alto = x_max - x_min, y_max - y_min
+    # El lienzo crece con el grafo; con el tope, la escala baja para que entre entero
+    escala = PULGADAS_POR_UNIDAD_RESUMEN if resumen else PULGADAS_POR_UNIDAD
+    escala = min(escala, MAX_PULGADAS / ancho, MAX_PULGADAS / alto)
+
+    # Figure sin pyplot: no queda estado global entre imágenes ni hace falta plt.close.
+    # Los límites se conocen de antemano, así que savefig no necesita
+    # bbox_inches='tight' (que dibuja la figura dos veces)
+    # Ancho mínimo para que entre el título (~0.13 pulgadas por carácter a 16 pt)
+    fig = Figure(figsize=(max(ancho * escala, 6.0, 0.13 * len(titulo)), max(alto * escala, 4.0) + 0.8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes((0.02, 0.02, 0.96, 0.96 - 0.8 / fig.get_figheight()))
+    ax.set_aspect('equal')
+    ax.set_axis_off()
+    ax.set_title(titulo, fontsize=16, weight='bold', pad=12)
+
+    es_final = np.array([e in finales for e in ids], dtype=bool)
+    _dibujar_estados(ax, xy, es_final, None if resumen else [etiquetas_estados[e] for e in ids],
+                     color_normal, color_final)
+
+    # Flecha del estado inicial
+    if inicial is not None:
+        inicial_pos = posiciones[inicial]
+        start_x = inicial_pos[0] - 1.0
+        start_y = inicial_pos[1]
+        ax.annotate('', xy=inicial_pos, xytext=(start_x, start_y),
+                    arrowprops=dict(arrowstyle='->', lw=2, color='red'))
+        ax.text(start_x - 0.3, start_y, 'Inicio', ha='center', va='center',
+                fontsize=10, weight='bold', color='red')
+
+    _dibujar_aristas(ax, posiciones, aristas, con_etiquetas=not resumen)
+
+    ax.set_xlim(x_min, x_max)
+    ax.set_ylim(y_min, y_max)
+
+    opciones = {}
+    if nombre_archivo.lower().endswith('.png'):
+        # Compresión rápida: el PNG crece algo pero se codifica varias veces más rápido
+        opciones['pil_kwargs'] = {'compress_level': 1}
+    fig.savefig(nombre_archivo, dpi=dpi if dpi is not None else DPI_GRAFICOS,
+                facecolor='white', edgecolor='none', **opciones)
+
+def dibujo_afn(afn: AFN, titulo: str = "AFN", limite_detalle: Optional[int] = None) -> dict:
+    """Todo lo que determina la imagen del AFN, en datos simples (picklables)"""
+    estados_ids = list(afn.estados.keys())
+
+    # Agrupar transiciones
+    transiciones_agrupadas: Dict[Tuple[int, int], Set[str]] = {}
+    for estado_id, estado in afn.estados.items():
+        for simbolo, destinos in estado.transiciones.items():
+            for destino in destinos:
+                transiciones_agrupadas.setdefault((estado_id, destino.id), set()).add(simbolo)
+
+    return _completar_dibujo({
+        'titulo': titulo,
+        'etiquetas_estados': {e: str(e) for e in estados_ids},
+        'finales': {e for e in estados_ids if afn.estados[e].es_final},
+        'inicial': afn.estado_inicial.id if afn.estado_inicial else None,
+        'aristas': {clave: ','.join(sorted(simbolos)).replace('@', 'ε')
+                    for clave, simbolos in transiciones_agrupadas.items()},
+        'color_normal': 'lightgray',
+        'color_final': 'lightblue',
+    }, limite_detalle)
+
+def dibujo_afd(afd: AFD, titulo: str = "AFD", limite_detalle: Optional[int] = None) -> dict:
+    """Todo lo que determina la imagen del AFD, en datos simples (picklables)"""
+    estados_ids = list(afd.estados.keys())
+
+    # Etiqueta del estado (mostrar IDs originales si es minimizado)
+    etiquetas: Dict[int, str] = {}
+    for estado_id in estados_ids:
+        ids_originales = afd.estados[estado_id]
+        if isinstance(ids_originales, frozenset) and len(ids_originales) > 1:
+            etiqueta = '{' + ','.join(map(str, sorted(ids_originales))) + '}'
+            # Un conjunto largo no cabe en el círculo y tapa a los vecinos: se usa el número
+            etiquetas[estado_id] = etiqueta if len(etiqueta) <= MAX_ETIQUETA_ESTADO else str(estado_id)
+        else:
+            etiquetas[estado_id] = str(estado_id)
+
+    # Agrupar transiciones
+    transiciones_agrupadas: Dict[Tuple[int, int], Set[str]] = {}
+    for origen, transiciones in afd.transiciones.items():
+        for simbolo, destino in transiciones.items():
+            transiciones_agrupadas.setdefault((origen, destino), set()).add(simbolo)
+
+    return _completar_dibujo({
+        'titulo': titulo,
+        'etiquetas_estados': etiquetas,
+        'finales': set(afd.estados_finales),
+        'inicial': afd.estado_inicial,
+        'aristas': {clave: ','.join(sorted(simbolos)) for clave, simbolos in transiciones_agrupadas.items()},
+        'color_normal': 'lightblue',
+        'color_final': 'lightgreen',
+    }, limite_detalle)
+
+def generar_imagen_afn(afn: AFN, nombre_archivo: str, titulo: str = "AFN", dpi: Optional[int] = None):
+    """Genera la imagen del AFN (el formato sale de la extensión del archivo)"""
     if not MATPLOTLIB_DISPONIBLE:
         print("No se puede generar imagen: matplotlib no disponible")
         return False
     
     try:
-        fig, ax = plt.subplots(1, 1, figsize=(12, 8))
-        ax.set_aspect('equal')
-        ax.set_title(titulo, fontsize=16, weight='bold', pad=20)
-        
-        # Obtener lista de estados
-        estados_ids = list(afn.estados.keys())
-        posiciones = calcular_posiciones_mejoradas(estados_ids)
-        
-        # Dibujar estados
-        for estado_id in estados_ids:
-            x, y = posiciones[estado_id]
-            estado = afn.estados[estado_id]
-            
-            # Determinar el estilo del estado
-            if estado.es_final:
-                # Estado final - doble círculo
-                outer_circle = Circle((x, y), 0.4, fill=True, facecolor='lightblue', 
-                                    edgecolor='black', linewidth=2)
-                inner_circle = Circle((x, y), 0.3, fill=False, edgecolor='black', linewidth=2)
-                ax.add_patch(outer_circle)
-                ax.add_patch(inner_circle)
-            else:
-                # Estado normal
-                circle = Circle((x, y), 0.35, fill=True, facecolor='lightgray', 
-                              edgecolor='black', linewidth=2)
-                ax.add_patch(circle)
-            
-            # Etiqueta del estado
-            ax.text(x, y, str(estado_id), ha='center', va='center', 
-                   fontsize=12, weight='bold')
-        
-        # Dibujar flecha del estado inicial
-        if afn.estado_inicial:
-            inicial_pos = posiciones[afn.estado_inicial.id]
-            start_x = inicial_pos[0] - 1.0
-            start_y = inicial_pos[1]
-            ax.annotate('', xy=inicial_pos, xytext=(start_x, start_y),
-                       arrowprops=dict(arrowstyle='->', lw=2, color='red'))
-            ax.text(start_x - 0.3, start_y, 'Inicio', ha='center', va='center', 
-                   fontsize=10, weight='bold', color='red')
-        
-        # Agrupar transiciones
-        transiciones_agrupadas = {}
-        
-        for estado_id, estado in afn.estados.items():
-            for simbolo, destinos in estado.transiciones.items():
-                for destino in destinos:
-                    clave = (estado_id, destino.id)
-                    if clave not in transiciones_agrupadas:
-                        transiciones_agrupadas[clave] = set()
-                    transiciones_agrupadas[clave].add(simbolo)
-        
-        # Dibujar transiciones
-        for (origen, destino), simbolos in transiciones_agrupadas.items():
-            simbolos_str = ','.join(sorted(simbolos)).replace('@', 'ε')
-            
-            if origen == destino:
-                # Auto-loop
-                dibujar_auto_loop(ax, posiciones[origen], simbolos_str)
-            else:
-                # Transición normal
-                start_pos = posiciones[origen]
-                end_pos = posiciones[destino]
-                
-                # Ajustar posiciones para no sobreponer los círculos
-                dx = end_pos[0] - start_pos[0]
-                dy = end_pos[1] - start_pos[1]
-                dist = math.sqrt(dx*dx + dy*dy)
-                
-                if dist > 0:
-                    # Normalizar
-                    dx /= dist
-                    dy /= dist
-                    
-                    # Ajustar inicio y fin
-                    radio = 0.35
-                    start_adj = (start_pos[0] + radio*dx, start_pos[1] + radio*dy)
-                    end_adj = (end_pos[0] - radio*dx, end_pos[1] - radio*dy)
-                    
-                    dibujar_flecha_curva(ax, start_adj, end_adj, simbolos_str)
-        
-        # Configurar ejes
-        ax.set_xlim(-5, 5)
-        ax.set_ylim(-5, 5)
-        ax.grid(True, alpha=0.3)
-        ax.set_xlabel('')
-        ax.set_ylabel('')
-        
-        # Guardar imagen
-        plt.tight_layout()
-        plt.savefig(nombre_archivo, dpi=300, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        plt.close()
-        
+        _guardar_grafo(nombre_archivo, dpi=dpi, **dibujo_afn(afn, titulo))
         return True
         
     except Exception as e:
         print(f"Error al generar imagen AFN: {e}")
         return False
 
-def generar_imagen_afd(afd: AFD, nombre_archivo: str, titulo: str = "AFD"):
-    """Genera imagen PNG del AFD"""
+def generar_imagen_afd(afd: AFD, nombre_archivo: str, titulo: str = "AFD", dpi: Optional[int] = None):
+    """Genera la imagen del AFD (el formato sale de la extensión del archivo)"""
     if not MATPLOTLIB_DISPONIBLE:
         print("No se puede generar imagen: matplotlib no disponible")
         return False
     
     try:
-        fig, ax = plt.subplots(1, 1, figsize=(12, 8))
-        ax.set_aspect('equal')
-        ax.set_title(titulo, fontsize=16, weight='bold', pad=20)
-        
-        # Obtener lista de estados
-        estados_ids = list(afd.estados.keys())
-        posiciones = calcular_posiciones_mejoradas(estados_ids)
-        
-        # Dibujar estados
-        for estado_id in estados_ids:
-            x, y = posiciones[estado_id]
-            
-            # Determinar el estilo del estado
-            if estado_id in afd.estados_finales:
-                # Estado final - doble círculo
-                outer_circle = Circle((x, y), 0.4, fill=True, facecolor='lightgreen', 
-                                    edgecolor='black', linewidth=2)
-                inner_circle = Circle((x, y), 0.3, fill=False, edgecolor='black', linewidth=2)
-                ax.add_patch(outer_circle)
-                ax.add_patch(inner_circle)
-            else:
-                # Estado normal
-                circle = Circle((x, y), 0.35, fill=True, facecolor='lightblue', 
-                              edgecolor='black', linewidth=2)
-                ax.add_patch(circle)
-            
-            # Etiqueta del estado (mostrar IDs originales si es minimizado)
-            if hasattr(afd, 'estados') and estado_id in afd.estados:
-                ids_originales = afd.estados[estado_id]
-                if isinstance(ids_originales, frozenset) and len(ids_originales) > 1:
-                    label = '{' + ','.join(map(str, sorted(ids_originales))) + '}'
-                else:
-                    label = str(estado_id)
-            else:
-                label = str(estado_id)
-            
-            ax.text(x, y, label, ha='center', va='center', 
-                   fontsize=10 if len(label) > 3 else 12, weight='bold')
-        
-        # Dibujar flecha del estado inicial
-        if afd.estado_inicial is not None:
-            inicial_pos = posiciones[afd.estado_inicial]
-            start_x = inicial_pos[0] - 1.0
-            start_y = inicial_pos[1]
-            ax.annotate('', xy=inicial_pos, xytext=(start_x, start_y),
-                       arrowprops=dict(arrowstyle='->', lw=2, color='red'))
-            ax.text(start_x - 0.3, start_y, 'Inicio', ha='center', va='center', 
-                   fontsize=10, weight='bold', color='red')
-        
-        # Agrupar transiciones
-        transiciones_agrupadas = {}
-        
-        for origen, transiciones in afd.transiciones.items():
-            for simbolo, destino in transiciones.items():
-                clave = (origen, destino)
-                if clave not in transiciones_agrupadas:
-                    transiciones_agrupadas[clave] = set()
-                transiciones_agrupadas[clave].add(simbolo)
-        
-        # Dibujar transiciones
-        for (origen, destino), simbolos in transiciones_agrupadas.items():
-            simbolos_str = ','.join(sorted(simbolos))
-            
-            if origen == destino:
-                # Auto-loop
-                dibujar_auto_loop(ax, posiciones[origen], simbolos_str)
-            else:
-                # Transición normal
-                start_pos = posiciones[origen]
-                end_pos = posiciones[destino]
-                
-                # Ajustar posiciones para no sobreponer los círculos
-                dx = end_pos[0] - start_pos[0]
-                dy = end_pos[1] - start_pos[1]
-                dist = math.sqrt(dx*dx + dy*dy)
-                
-                if dist > 0:
-                    # Normalizar
-                    dx /= dist
-                    dy /= dist
-                    
-                    # Ajustar inicio y fin
-                    radio = 0.35
-                    start_adj = (start_pos[0] + radio*dx, start_pos[1] + radio*dy)
-                    end_adj = (end_pos[0] - radio*dx, end_pos[1] - radio*dy)
-                    
-                    dibujar_flecha_curva(ax, start_adj, end_adj, simbolos_str)
-        
-        # Configurar ejes
-        ax.set_xlim(-5, 5)
-        ax.set_ylim(-5, 5)
-        ax.grid(True, alpha=0.3)
-        ax.set_xlabel('')
-        ax.set_ylabel('')
-        
-        # Guardar imagen
-        plt.tight_layout()
-        plt.savefig(nombre_archivo, dpi=300, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        plt.close()
-        
+        _guardar_grafo(nombre_archivo, dpi=dpi, **dibujo_afd(afd, titulo))
         return True
         
     except Exception as e:
         print(f"Error al generar imagen AFD: {e}")
         return False
 
-def visualizar_automatas(afn: AFN, afd: AFD, afd_min: AFD, expresion: str, numero_linea: int):
-    """Genera visualizaciones para todos los autómatas"""
+def huella_dibujo(dibujo: dict, dpi: int, extension: str) -> str:
+    """Hash del contenido de la imagen: dos dibujos con la misma huella dan el mismo archivo"""
+    canonico = (VERSION_DIBUJO, extension, dpi, dibujo['titulo'],
+                sorted(dibujo['posiciones'].items()), sorted(dibujo['etiquetas_estados'].items()),
+                sorted(dibujo['finales']), dibujo['inicial'], sorted(dibujo['aristas'].items()),
+                dibujo['color_normal'], dibujo['color_final'], dibujo['resumen'])
+    return hashlib.sha256(repr(canonico).encode('utf-8')).hexdigest()[:32]
+
+def _renderizar(ruta: str, dibujo: dict, dpi: int) -> str:
+    """Dibuja en un temporal y lo publica con os.replace: en el almacén sólo hay imágenes completas"""
+    base, extension = os.path.splitext(ruta)
+    temporal = f"{base}.{os.getpid()}.tmp{extension}"
+    try:
+        _guardar_grafo(temporal, dpi=dpi, **dibujo)
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return ruta
+
+def _enlazar(origen: str, destino: str):
+    if os.path.exists(destino):
+        if os.path.samefile(origen, destino):
+            return
+        os.remove(destino)
+    try:
+        os.link(origen, destino)
+    except OSError:
+        # Sistemas de archivos sin enlaces duros
+        shutil.copyfile(origen, destino)
+
+class ColaGraficos:
+    """Dibuja las imágenes en un pool de procesos sin bloquear al que encola.
+
+    Cada imagen se guarda una sola vez en graficos/.contenido con su huella
+    como nombre; los archivos por línea (AFN_L001_...) son enlaces a ella.
+    Una expresión repetida o sin cambios desde la corrida anterior no se
+    vuelve a dibujar."""
+
+    def __init__(self, procesos: Optional[int] = PROCESOS_GRAFICOS, dpi: Optional[int] = None,
+                 formato: Optional[str] = None):
+        self.dpi = dpi if dpi is not None else DPI_GRAFICOS
+        self.extension = formato if formato is not None else FORMATO_GRAFICOS
+        # procesos=0 dibuja en el mismo proceso, al encolar
+        self.pool = ProcessPoolExecutor(max_workers=procesos) if procesos != 0 else None
+        # Dibujos enviados y todavía sin terminar, por huella
+        self.pendientes: Dict[str, Future] = {}
+        self.dibujadas = 0
+        self.reutilizadas = 0
+        self.errores: List[Tuple[str, str]] = []
+        os.makedirs(DIRECTORIO_CONTENIDO, exist_ok=True)
+
+    def encolar(self, afn: AFN, afd: Optional[AFD], afd_min: Optional[AFD], expresion: str,
+                numero_linea: int) -> List[str]:
+        """Encola las imágenes de la línea y devuelve una descripción de cada una.
+        Sin AFD (--perezoso) sólo se dibuja el AFN"""
+        if not MATPLOTLIB_DISPONIBLE:
+            print("   matplotlib no disponible - saltando generación de imágenes")
+            return []
+
+        # Limpiar expresión para usar en nombres de archivo
+        expr_limpia = limpiar_nombre_archivo(expresion)
+        # El título no lleva el número de línea para que las repeticiones compartan imagen
+        trabajos = [('AFN', 'AFN', dibujo_afn(afn, f"AFN: {expresion}"))]
+        if afd is not None:
+            trabajos.append(('AFD', 'AFD', dibujo_afd(afd, f"AFD: {expresion}")))
+        if afd_min is not None:
+            trabajos.append(('AFD_MIN', 'AFD Minimizado', dibujo_afd(afd_min, f"AFD Minimizado: {expresion}")))
+        resultados = []
+        for prefijo, nombre, dibujo in trabajos:
+            destino = f"{DIRECTORIO_GRAFICOS}/{prefijo}_L{numero_linea:03d}_{expr_limpia}.{self.extension}"
+            resultados.append(f"{nombre}: {destino} ({self._encolar_dibujo(dibujo, destino)})")
+        return resultados
+
+    def _encolar_dibujo(self, dibujo: dict, destino: str) -> str:
+        huella = huella_dibujo(dibujo, self.dpi, self.extension)
+        ruta = os.path.join(DIRECTORIO_CONTENIDO, f"{huella}.{self.extension}")
+
+        pendiente = self.pendientes.get(huella)
+        if pendiente is not None:
+            self.reutilizadas += 1
+            pendiente.add_done_callback(lambda f: self._publicar(f, ruta, destino))
+            return 'reutilizada'
+        if os.path.exists(ruta):
+            self.reutilizadas += 1
+            _enlazar(ruta, destino)
+            return 'sin cambios'
+
+        self.dibujadas += 1
+        if self.pool is None:
+            try:
+                _renderizar(ruta, dibujo, self.dpi)
+                _enlazar(ruta, destino)
+            except Exception as e:
+                self.errores.append((destino, str(e)))
+                return 'error'
+            return 'dibujada'
+
+        futuro = self.pool.submit(_renderizar, ruta, dibujo, self.dpi)
+        self.pendientes[huella] = futuro
+        futuro.add_done_callback(lambda f: self._publicar(f, ruta, destino))
+        return 'en cola'
+
+    def _publicar(self, futuro: Future, ruta: str, destino: str):
+        # Corre en el hilo del pool que recibe el resultado
+        try:
+            futuro.result()
+            _enlazar(ruta, destino)
+        except Exception as e:
+            self.errores.append((destino, str(e)))
+
+    def cerrar(self) -> Dict[str, int]:
+        """Espera a que terminen todos los dibujos"""
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+        self.pendientes.clear()
+        return {'dibujadas': self.dibujadas, 'reutilizadas': self.reutilizadas, 'errores': len(self.errores)}
+
+def visualizar_automatas(afn: AFN, afd: AFD, afd_min: AFD, expresion: str, numero_linea: int,
+                         dpi: Optional[int] = None, formato: Optional[str] = None):
+    """Genera visualizaciones para todos los autómatas (sin pool: vuelve con las imágenes escritas)"""
     if not MATPLOTLIB_DISPONIBLE:
         print("   matplotlib no disponible - saltando generación de imágenes")
         return
-    
-    # Limpiar expresión para usar en nombres de archivo
-    expr_limpia = limpiar_nombre_archivo(expresion)
-    
-    resultados = []
-    
-    # AFN
-    nombre_afn = f"graficos/AFN_L{numero_linea:03d}_{expr_limpia}.png"
-    if generar_imagen_afn(afn, nombre_afn, f"AFN - Línea {numero_linea}: {expresion}"):
-        resultados.append(f"AFN: {nombre_afn}")
-    
-    # AFD
-    nombre_afd = f"graficos/AFD_L{numero_linea:03d}_{expr_limpia}.png"
-    if generar_imagen_afd(afd, nombre_afd, f"AFD - Línea {numero_linea}: {expresion}"):
-        resultados.append(f"AFD: {nombre_afd}")
-    
-    # AFD Minimizado
-    nombre_afd_min = f"graficos/AFD_MIN_L{numero_linea:03d}_{expr_limpia}.png"
-    if generar_imagen_afd(afd_min, nombre_afd_min, f"AFD Minimizado - Línea {numero_linea}: {expresion}"):
-        resultados.append(f"AFD Minimizado: {nombre_afd_min}")
-    
+
+    cola = ColaGraficos(procesos=0, dpi=dpi, formato=formato)
+    resultados = cola.encolar(afn, afd, afd_min, expresion, numero_linea)
+    cola.cerrar()
+
     # Mostrar resultados
     for resultado in resultados:
         print(f"   ✓ {resultado}")
+    for destino, error in cola.errores:
+        print(f"   Error al generar {destino}: {error}")
 
 def limpiar_nombre_archivo(nombre: str) -> str:
     """Limpia un string para usarlo como nombre de archivo"""
@@ -412,6 +550,6 @@ def limpiar_nombre_archivo(nombre: str) -> str:
 
 def crear_directorio_graficos():
     """Crea el directorio para guardar gráficos si no existe"""
-    if not os.path.exists('graficos'):
-        os.makedirs('graficos')
+    if not os.path.exists(DIRECTORIO_GRAFICOS):
+        os.makedirs(DIRECTORIO_GRAFICOS)
         print("Directorio 'graficos' creado.")